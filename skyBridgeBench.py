@@ -0,0 +1,191 @@
+"""Headless benchmark for Sky-Bridge Siege.
+
+Builds a few game scenarios, renders them through the recording backend, and
+reports draw calls, vertices, state changes and CPU time per frame alongside
+simulation tick time. No GPU or window is needed. A fresh interpreter also times
+startup: import to the first simulation tick and to the first rendered frame.
+
+    python skyBridgeBench.py            # report
+    python skyBridgeBench.py --check    # also fail if a scenario exceeds its budget
+    python skyBridgeBench.py --quality 2  # render at a degraded quality level
+    python skyBridgeBench.py --substeps 2 # tick with two simulation substeps
+    python skyBridgeBench.py --pacing 10  # frame pacing during a stress wave, worker vs inline
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+import skyBridgeSiege as sbs
+
+# Per-frame ceilings for --check; raise them deliberately, not to make a run pass
+BUDGETS = {
+    'empty':      {'draw_calls': 100,  'vertices': 1500},
+    'full_tower': {'draw_calls': 650,  'vertices': 13500},
+    'wave_1k':    {'draw_calls': 1200, 'vertices': 320000},
+    'nuke':       {'draw_calls': 100,  'vertices': 8000},
+}
+
+def fill_tower(game, layers):
+    for z in range(layers):
+        for x in range(sbs.TOWER_GRID_SIZE):
+            for y in range(sbs.TOWER_GRID_SIZE):
+                game.set_cell(x, y, z, 1 + (x + y + z) % len(sbs.TETRIS_COLORS))
+    game.recalculate_tower_height()
+
+def scenario_empty(game):
+    pass
+
+def scenario_full_tower(game):
+    fill_tower(game, sbs.TOWER_LIMIT - 1)
+    game.slice_mode = True
+
+def scenario_wave_1k(game):
+    waves = sbs.WaveScheduler('stress')
+    game.enemies = [waves.make_enemy() for _ in range(1000)]
+
+def scenario_nuke(game):
+    game.nuke_available = True
+    game.use_nuke()
+    for _ in range(30): game.update_nuke(1 / sbs.TICK_RATE)
+
+SCENARIOS = {
+    'empty': scenario_empty,
+    'full_tower': scenario_full_tower,
+    'wave_1k': scenario_wave_1k,
+    'nuke': scenario_nuke,
+}
+
+# Run in a fresh interpreter so module import cost is measured cold
+STARTUP_PROBE = '''
+import json, sys, time
+start = time.perf_counter()
+import skyBridgeSiege as sbs
+imported = time.perf_counter()
+sim = sbs.Simulation(sbs.GameState())
+sim.step()
+ticked = time.perf_counter()
+sbs.gfx = sbs.RecordingBackend()
+sbs.render_frame(sim.front())
+sbs.gfx.swap_buffers()
+drawn = time.perf_counter()
+print(json.dumps({'import_ms': (imported - start) * 1000, 'first_tick_ms': (ticked - start) * 1000,
+                  'first_frame_ms': (drawn - start) * 1000, 'opengl_loaded': 'OpenGL' in sys.modules}))
+'''
+
+def measure_startup():
+    out = subprocess.run([sys.executable, '-c', STARTUP_PROBE], capture_output=True, text=True, check=True,
+                         cwd=os.path.dirname(os.path.abspath(__file__))).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+def run_scenario(name, frames, ticks, level=0, substeps=1):
+    quality = sbs.QUALITY_LEVELS[level]
+    game = sbs.GameState()
+    game.quality = quality
+    game.lives = 10 ** 9   # Keep the horde scenarios running
+    SCENARIOS[name](game)
+    game.update_player(1 / sbs.TICK_RATE)
+    snapshot = game.snapshot()
+
+    backend = sbs.gfx = sbs.RecordingBackend()
+    start = time.perf_counter()
+    for _ in range(frames):
+        sbs.render_frame(snapshot, quality)
+        backend.swap_buffers()
+    frame_ms = (time.perf_counter() - start) / frames * 1000
+
+    start = time.perf_counter()
+    for _ in range(ticks):
+        for _ in range(substeps):
+            game.update_world(1 / sbs.TICK_RATE / substeps)
+    tick_ms = (time.perf_counter() - start) / max(ticks, 1) * 1000
+    return {'scenario': name, 'tick_ms': tick_ms, 'frame_ms': frame_ms, **backend.last_frame._asdict()}
+
+def run_pacing(seconds, worker):
+    # Render at 60 fps on this process while a stress wave ramps up. With a worker,
+    # the simulation runs in its own process and frames draw the latest snapshot;
+    # inline, each frame steps it first, as a single-threaded loop would.
+    # Intervals are measured between presented frames.
+    game = sbs.GameState('stress')
+    game.lives = 10 ** 9
+    sim = sbs.Simulation(game)
+    sbs.gfx = sbs.RecordingBackend()
+    frame_dt = 1 / 60
+    intervals = []; renders = []
+    if worker:
+        sim.start()
+        while not sim.poll(): time.sleep(0.001)   # Process start-up is not a late frame
+    last = next_frame = time.perf_counter(); end = last + seconds
+    try:
+        while True:
+            now = time.perf_counter()
+            if now >= end: break
+            if now < next_frame:
+                time.sleep(next_frame - now); continue
+            if worker: sim.poll()
+            else: sim.step()
+            start = time.perf_counter()
+            sbs.render_frame(sim.front())
+            sbs.gfx.swap_buffers()
+            done = time.perf_counter()
+            renders.append(done - start); intervals.append(done - last)
+            last = done; next_frame = max(next_frame + frame_dt, done)
+    finally:
+        if worker: sim.stop()
+    intervals.sort(); renders.sort()
+    def pct(values, p): return values[min(len(values) - 1, int(len(values) * p))] * 1000
+    return {'mode': 'process' if worker else 'inline', 'frames': len(intervals), 'enemies': len(sim.front().enemies),
+            'p50_ms': pct(intervals, 0.5), 'p95_ms': pct(intervals, 0.95), 'max_ms': intervals[-1] * 1000,
+            'render_p95_ms': pct(renders, 0.95), 'late': sum(1 for t in intervals if t > 1.5 * frame_dt)}
+
+def report_pacing(results):
+    print(f"{'pacing':<10} {'frames':>7} {'enemies':>8} {'p50 ms':>7} {'p95 ms':>7} {'max ms':>7} "
+          f"{'render p95':>10} {'late':>5}")
+    for r in results:
+        print(f"{r['mode']:<10} {r['frames']:>7} {r['enemies']:>8} {r['p50_ms']:>7.1f} {r['p95_ms']:>7.1f} "
+              f"{r['max_ms']:>7.1f} {r['render_p95_ms']:>10.2f} {r['late']:>5}")
+
+def check(results, startup=None):
+    failures = []
+    if startup and startup['opengl_loaded']:
+        failures.append("startup: importing skyBridgeSiege loaded OpenGL")
+    for r in results:
+        for key, limit in BUDGETS.get(r['scenario'], {}).items():
+            if r[key] > limit:
+                failures.append(f"{r['scenario']}: {key} {r[key]} > budget {limit}")
+    return failures
+
+def report(results, startup=None):
+    if startup:
+        print(f"startup: import {startup['import_ms']:.1f} ms, first tick {startup['first_tick_ms']:.1f} ms, "
+              f"first frame {startup['first_frame_ms']:.1f} ms")
+    print(f"{'scenario':<12} {'tick ms':>8} {'frame ms':>9} {'draws':>7} {'vertices':>9} {'states':>7} {'xforms':>7}")
+    for r in results:
+        print(f"{r['scenario']:<12} {r['tick_ms']:>8.2f} {r['frame_ms']:>9.2f} {r['draw_calls']:>7} "
+              f"{r['vertices']:>9} {r['state_changes']:>7} {r['transforms']:>7}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Sky-Bridge Siege headless benchmark")
+    parser.add_argument('--scenarios', nargs='+', choices=sorted(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument('--frames', type=int, default=20)
+    parser.add_argument('--ticks', type=int, default=120)
+    parser.add_argument('--quality', type=int, choices=range(len(sbs.QUALITY_LEVELS)), default=0,
+                        help="Quality level to render and tick at (0 is full quality)")
+    parser.add_argument('--substeps', type=int, choices=range(1, sbs.MAX_SUBSTEPS + 1), default=1,
+                        help="Simulation substeps per tick")
+    parser.add_argument('--check', action='store_true', help="Exit non-zero if a scenario exceeds its budget")
+    parser.add_argument('--pacing', type=float, metavar='SECONDS',
+                        help="Also measure frame pacing during a stress wave, worker process and inline")
+    args = parser.parse_args()
+    results = [run_scenario(name, args.frames, args.ticks, args.quality, args.substeps) for name in args.scenarios]
+    startup = measure_startup()
+    report(results, startup)
+    if args.pacing: report_pacing([run_pacing(args.pacing, worker) for worker in (True, False)])
+    failures = check(results, startup)
+    for f in failures: print(f"[BUDGET] {f}")
+    if args.check and failures: sys.exit(1)
+
+if __name__ == "__main__":
+    main()
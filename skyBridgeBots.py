@@ -0,0 +1,115 @@
+"""Bot-client load generator for the Sky-Bridge Siege server.
+
+Starts an in-process server (or targets one with --port), connects N bots that
+send random input frames, and reports server tick time and bandwidth per client.
+
+    python skyBridgeBots.py --clients 2 8 32 --duration 10
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from skyBridgeServer import (ACTION_FIRE, ACTION_GRENADE, ACTION_RESTART, DEFAULT_HOST, FLAG_GAME_OVER,
+                             FRAME, INPUT, KEY_BITS, MSG_INPUT, SERVER_TICK_RATE, WELCOME, SiegeServer,
+                             apply_snapshot, frame, new_view, read_frame)
+
+INPUT_RATE = 30   # Input frames per second per bot
+# Bots strafe and aim along the wall; they never walk off it
+BOT_KEYS = [1 << KEY_BITS.index(k) for k in ('a', 'd', 'left', 'right', 'up', 'down')]
+
+class BotStats:
+    def __init__(self):
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.snapshots = 0
+
+async def run_bot(host, port, duration, stats, rng):
+    reader, writer = await asyncio.open_connection(host, port)
+    WELCOME.unpack(await read_frame(reader))
+    view = new_view()
+
+    async def receive():
+        while True:
+            payload = await read_frame(reader)
+            stats.bytes_in += FRAME.size + len(payload); stats.snapshots += 1
+            apply_snapshot(view, payload)
+
+    receiver = asyncio.create_task(receive())
+    loop = asyncio.get_running_loop()
+    end = loop.time() + duration
+    keys = 0; seq = 0
+    try:
+        while loop.time() < end:
+            if rng.random() < 0.1:
+                keys = 0
+                for bit in rng.sample(BOT_KEYS, 2): keys |= bit
+            actions = 0
+            if rng.random() < 0.3: actions |= ACTION_FIRE
+            if rng.random() < 0.01: actions |= ACTION_GRENADE
+            if view['scalars'] and view['scalars'][4] & FLAG_GAME_OVER: actions |= ACTION_RESTART
+            data = frame(INPUT.pack(MSG_INPUT, seq, keys, actions)); seq += 1
+            writer.write(data); stats.bytes_out += len(data)
+            await writer.drain()
+            await asyncio.sleep(1 / INPUT_RATE)
+    finally:
+        receiver.cancel()
+        writer.close()
+        await writer.wait_closed()
+
+async def measure(clients, duration, tick_rate, host=DEFAULT_HOST, port=None, seed=0):
+    server = None; ticker = None
+    if port is None:
+        server = SiegeServer(host, 0, tick_rate)
+        await server.start()
+        port = server.port
+        ticker = asyncio.create_task(server.run(log_stats=False))
+    stats = [BotStats() for _ in range(clients)]
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    first_tick = server.tick if server else 0
+    await asyncio.gather(*(run_bot(host, port, duration, s, random.Random(rng.random())) for s in stats))
+    elapsed = time.perf_counter() - start
+    result = {
+        'clients': clients,
+        'down_kbps': sum(s.bytes_in for s in stats) / clients / elapsed / 1024,
+        'up_kbps': sum(s.bytes_out for s in stats) / clients / elapsed / 1024,
+        'snapshots': sum(s.snapshots for s in stats) / clients,
+    }
+    if server:
+        ticker.cancel()
+        await server.close()
+        times = sorted(list(server.tick_times)[-(server.tick - first_tick):])
+        result.update(ticks=len(times), tick_mean_ms=sum(times) / len(times) * 1000,
+                      tick_p95_ms=times[min(len(times) - 1, int(len(times) * 0.95))] * 1000,
+                      tick_max_ms=times[-1] * 1000)
+    return result
+
+def report(results):
+    print(f"{'clients':>7} {'ticks':>6} {'mean ms':>8} {'p95 ms':>8} {'max ms':>8} {'down kB/s':>10} {'up kB/s':>8}")
+    for r in results:
+        if 'ticks' in r:
+            tick = f"{r['ticks']:>6} {r['tick_mean_ms']:>8.2f} {r['tick_p95_ms']:>8.2f} {r['tick_max_ms']:>8.2f}"
+        else:
+            tick = f"{'-':>6} {'-':>8} {'-':>8} {'-':>8}"
+        print(f"{r['clients']:>7} {tick} {r['down_kbps']:>10.2f} {r['up_kbps']:>8.2f}")
+
+async def run_all(args):
+    results = []
+    for n in args.clients:
+        print(f"[BOTS] {n} clients for {args.duration:.0f}s...")
+        results.append(await measure(n, args.duration, args.tick_rate, args.host, args.port, args.seed))
+    report(results)
+
+def main():
+    parser = argparse.ArgumentParser(description="Sky-Bridge Siege server load generator")
+    parser.add_argument('--clients', type=int, nargs='+', default=[2, 8, 32])
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--tick-rate', type=int, default=SERVER_TICK_RATE)
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=None, help="Use a running server instead of an in-process one")
+    parser.add_argument('--seed', type=int, default=0)
+    asyncio.run(run_all(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
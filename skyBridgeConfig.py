@@ -0,0 +1,116 @@
+"""Configuration for Sky-Bridge Siege.
+
+Plain constants with no imports, so servers, bots, benchmarks and the game itself
+can share them without loading OpenGL or building any game state.
+"""
+# ================= CONFIGURATION =================
+WINDOW_WIDTH, WINDOW_HEIGHT = 1000, 800
+FOV_Y = 60
+
+# --- Geometry Constants ---
+BLOCK_SIZE = 40  
+TOWER_LIMIT = 15 
+MAX_GRID_HEIGHT = TOWER_LIMIT + 20 
+WALL_HEIGHT = TOWER_LIMIT * BLOCK_SIZE 
+WALL_CENTER_Y = -50
+WALL_THICKNESS = 40
+WALL_FRONT_FACE = WALL_CENTER_Y + (WALL_THICKNESS / 2)
+
+TOWER_GRID_SIZE = 4
+TOWER_CENTER_Y = 300
+TOWER_CENTER_X = 0
+
+# --- Simulation ---
+TICK_RATE = 60            # Fixed simulation ticks per second
+MAX_CATCHUP_TICKS = 5     # Ticks run back-to-back before the backlog is dropped
+SIM_NICE = 10             # Scheduling niceness of the simulation worker process (POSIX)
+
+# --- Quality Governor ---
+FRAME_TARGET_MS = 16.6    # Render work per frame the governor tries to stay under
+TICK_SHARE = 0.5          # Fraction of the frame target a simulation tick may use
+QUALITY_WINDOW = 30       # Samples averaged before each decision
+QUALITY_COOLDOWN = 0.5    # Seconds between decisions
+QUALITY_HEADROOM = 0.6    # Restore once load would stay below this fraction of the target
+MAX_SUBSTEPS = 2          # Simulation substeps per tick when ticks have spare time; 1 otherwise
+# Ordered best to cheapest, driven by frame time only. particles scales emission per
+# explosion, sphere_detail scales sphere tessellation, cull_hidden_blocks skips fully
+# enclosed tower cubes, hud_interval is how long (s) a rendered HUD is reused.
+QUALITY_LEVELS = [
+    {'particles': 1.0,  'sphere_detail': 1.0,  'cull_hidden_blocks': False, 'hud_interval': 0.0},
+    {'particles': 0.6,  'sphere_detail': 0.75, 'cull_hidden_blocks': True,  'hud_interval': 0.1},
+    {'particles': 0.35, 'sphere_detail': 0.5,  'cull_hidden_blocks': True,  'hud_interval': 0.25},
+    {'particles': 0.15, 'sphere_detail': 0.33, 'cull_hidden_blocks': True,  'hud_interval': 0.5},
+]
+
+# Colors
+COLOR_BG = (0.05, 0.05, 0.1)
+COLOR_WALL = (0.3, 0.3, 0.4)
+COLOR_PLAYER = (0.0, 1.0, 0.0)
+COLOR_GUN = (0.0, 0.8, 0.8)
+COLOR_ENEMY = (1.0, 0.0, 0.0)
+COLOR_SUMMONER = (0.8, 0.0, 0.0) 
+COLOR_BULLET = (1.0, 1.0, 0.0)
+COLOR_GRENADE = (0.0, 0.8, 0.0)
+COLOR_ZONE = (0.5, 0.0, 0.0)
+COLOR_HIGHLIGHT_VALID = (0.0, 1.0, 0.0, 0.6)    
+COLOR_HIGHLIGHT_INVALID = (1.0, 0.0, 0.0, 0.3) 
+
+# --- Enemies & Waves ---
+# Enemy archetypes; the index is stored in enemy[5]
+ENEMY_TYPES = [
+    {'name': 'grunt',  'speed': (70, 90),   'radius': 12, 'damage': 1, 'score': 10, 'color': COLOR_ENEMY},
+    {'name': 'runner', 'speed': (110, 140), 'radius': 9,  'damage': 1, 'score': 15, 'color': (1.0, 0.5, 0.0)},
+    {'name': 'brute',  'speed': (40, 55),   'radius': 18, 'damage': 2, 'score': 30, 'color': (0.6, 0.0, 0.3)},
+]
+ENEMY_TYPE_INDEX = {t['name']: i for i, t in enumerate(ENEMY_TYPES)}
+
+# Spawn tables. Each wave spawns `count` enemies drawn from `mix` (type -> weight)
+# at `rate` per second. Once the table runs out, the last wave repeats with its
+# count multiplied by `ramp` each time, up to `max_count`. `budget` caps spawns per
+# tick so a new wave is spread over several frames. With `overlap`, the next wave
+# starts after the intermission even if the previous one is still alive.
+WAVE_PRESETS = {
+    'standard': {
+        'waves': [
+            {'count': 5,  'mix': {'grunt': 1},                          'rate': 10},
+            {'count': 8,  'mix': {'grunt': 3, 'runner': 1},             'rate': 6},
+            {'count': 12, 'mix': {'grunt': 3, 'runner': 1, 'brute': 1}, 'rate': 6},
+            {'count': 20, 'mix': {'grunt': 3, 'runner': 2, 'brute': 1}, 'rate': 8},
+        ],
+        'ramp': 1.3, 'max_count': 2000, 'ring': (100, 140),
+        'intermission': 3.0, 'budget': 8, 'overlap': False,
+    },
+    # Throughput ceiling finder: population doubles every wave and never has to be cleared
+    'stress': {
+        'waves': [
+            {'count': 500, 'mix': {'grunt': 2, 'runner': 1, 'brute': 1}, 'rate': 1000},
+        ],
+        'ramp': 2.0, 'max_count': 16000, 'ring': (100, 300),
+        'intermission': 2.0, 'budget': 64, 'overlap': True,
+    },
+}
+WAVE_PRESET = 'standard'
+
+# --- Navigation ---
+ARENA_HALF = 600          # Arena spans [-ARENA_HALF, ARENA_HALF] on x and y
+NAV_CELL = 40             # Flow field cell size
+NAV_GRID = 2 * ARENA_HALF // NAV_CELL
+WALL_HALF_WIDTH = 300     # Enemies only climb where the wall actually is
+SEPARATION_WEIGHT = 0.8   # How hard crowded enemies push apart relative to the flow
+
+# Tetris colors
+TETRIS_COLORS = [
+    (0.0, 0.8, 0.8), (0.0, 0.0, 1.0), (0.8, 0.4, 0.0), 
+    (0.8, 0.8, 0.0), (0.5, 0.0, 0.8), (1.0, 0.0, 0.0), (0.0, 0.8, 0.0)
+]
+
+# Tetris shapes
+TETRIS_SHAPES = [
+    [(0,0), (1,0), (2,0), (3,0)], # I (0)
+    [(0,0), (1,0), (0,1), (1,1)], # O (1)
+    [(1,0), (0,1), (1,1), (2,1)], # T (2)
+    [(0,0), (0,1), (1,1), (2,1)], # L (3)
+    [(2,0), (0,1), (1,1), (2,1)], # J (4)
+    [(1,0), (2,0), (0,1), (1,1)], # S (5)
+    [(0,0), (1,0), (1,1), (2,1)]  # Z (6)
+]
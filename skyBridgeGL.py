@@ -0,0 +1,130 @@
+"""OpenGL/GLUT front end for Sky-Bridge Siege.
+
+Only the windowed game imports this module (from skyBridgeSiege.main), so the
+simulation, server, bots and benchmarks never load PyOpenGL or need a GL library.
+
+    python skyBridgeSiege.py
+"""
+from OpenGL.GL import *
+from OpenGL.GLUT import *
+from OpenGL.GLU import *
+import time
+
+from skyBridgeConfig import COLOR_BG, FOV_Y, WINDOW_HEIGHT, WINDOW_WIDTH
+
+SPECIAL_KEYS = {GLUT_KEY_LEFT: 'left', GLUT_KEY_RIGHT: 'right', GLUT_KEY_UP: 'up', GLUT_KEY_DOWN: 'down'}
+MOUSE_BUTTONS = {GLUT_LEFT_BUTTON: 'left', GLUT_RIGHT_BUTTON: 'right'}
+
+class GLBackend:
+    def __init__(self):
+        self.quadric = gluNewQuadric()
+        self.blend_modes = {'alpha': (GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA), 'additive': (GL_SRC_ALPHA, GL_ONE)}
+        self.primitives = {'lines': GL_LINES, 'quads': GL_QUADS, 'points': GL_POINTS}
+        self.lists = {}   # cached() key -> [display list id, compiled at]
+
+    def clear(self):
+        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+        glLoadIdentity()
+
+    def look_at(self, eye, target):
+        gluLookAt(eye[0], eye[1], eye[2], target[0], target[1], target[2], 0, 0, 1)
+
+    def push_matrix(self): glPushMatrix()
+    def pop_matrix(self): glPopMatrix()
+    def translate(self, x, y, z): glTranslatef(x, y, z)
+    def scale(self, x, y, z): glScalef(x, y, z)
+    def rotate(self, angle, x, y, z): glRotatef(angle, x, y, z)
+
+    def color(self, r, g, b, a=None):
+        if a is None: glColor3f(r, g, b)
+        else: glColor4f(r, g, b, a)
+
+    def blend(self, mode):
+        if mode is None:
+            glDisable(GL_BLEND)
+        else:
+            glEnable(GL_BLEND); glBlendFunc(*self.blend_modes[mode])
+
+    def point_size(self, size): glPointSize(size)
+    def begin(self, primitive): glBegin(self.primitives[primitive])
+    def end(self): glEnd()
+
+    def vertex(self, x, y, z=None):
+        if z is None: glVertex2f(x, y)
+        else: glVertex3f(x, y, z)
+
+    def solid_cube(self, size): glutSolidCube(size)
+    def solid_sphere(self, radius, slices, stacks): glutSolidSphere(radius, slices, stacks)
+    def cylinder(self, base, top, height, slices, stacks): gluCylinder(self.quadric, base, top, height, slices, stacks)
+
+    def begin_overlay(self):
+        glMatrixMode(GL_PROJECTION); glPushMatrix(); glLoadIdentity()
+        gluOrtho2D(0, WINDOW_WIDTH, 0, WINDOW_HEIGHT)
+        glMatrixMode(GL_MODELVIEW); glPushMatrix(); glLoadIdentity()
+
+    def end_overlay(self):
+        glPopMatrix(); glMatrixMode(GL_PROJECTION); glPopMatrix(); glMatrixMode(GL_MODELVIEW)
+
+    def text(self, x, y, text, color):
+        glColor3f(*color)
+        self.begin_overlay()
+        glRasterPos2f(x, y)
+        for ch in text:
+            glutBitmapCharacter(GLUT_BITMAP_HELVETICA_18, ord(ch))
+        self.end_overlay()
+
+    def cached(self, key, interval, draw):
+        # Replay a display list until it is `interval` seconds old, then recompile it
+        if interval <= 0: draw(); return
+        now = time.perf_counter()
+        entry = self.lists.get(key)
+        if entry and now - entry[1] < interval:
+            glCallList(entry[0]); return
+        if not entry: entry = self.lists[key] = [glGenLists(1), now]
+        entry[1] = now
+        glNewList(entry[0], GL_COMPILE_AND_EXECUTE)
+        draw()
+        glEndList()
+
+    def swap_buffers(self): glutSwapBuffers()
+
+def open_window(title):
+    glutInit()
+    glutInitDisplayMode(GLUT_DOUBLE | GLUT_RGB | GLUT_DEPTH)
+    glutInitWindowSize(WINDOW_WIDTH, WINDOW_HEIGHT)
+    glutCreateWindow(title)
+    glEnable(GL_DEPTH_TEST)
+    glEnable(GL_BLEND) 
+    glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+    glClearColor(*COLOR_BG, 1.0)
+    
+    glMatrixMode(GL_PROJECTION)
+    glLoadIdentity()
+    gluPerspective(FOV_Y, WINDOW_WIDTH / WINDOW_HEIGHT, 0.1, 1500)
+    glMatrixMode(GL_MODELVIEW)
+    return GLBackend()
+
+def run(display, ready, keyboard, keyboard_up, special, special_up, mouse):
+    # Redraw only when `ready()` reports a new snapshot; otherwise give the CPU back
+    def on_idle():
+        if ready(): glutPostRedisplay()
+        else: time.sleep(0.001)
+
+    # GLUT key codes and buttons are translated to names before reaching the game
+    def on_special(key, x, y):
+        if key in SPECIAL_KEYS: special(SPECIAL_KEYS[key])
+
+    def on_special_up(key, x, y):
+        if key in SPECIAL_KEYS: special_up(SPECIAL_KEYS[key])
+
+    def on_mouse(button, state, x, y):
+        if state == GLUT_DOWN and button in MOUSE_BUTTONS: mouse(MOUSE_BUTTONS[button])
+
+    glutDisplayFunc(display)
+    glutIdleFunc(on_idle)
+    glutKeyboardFunc(keyboard)
+    glutKeyboardUpFunc(keyboard_up)
+    glutSpecialFunc(on_special)
+    glutSpecialUpFunc(on_special_up)
+    glutMouseFunc(on_mouse)
+    glutMainLoop()
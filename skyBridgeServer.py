@@ -0,0 +1,384 @@
+"""Authoritative local multiplayer server for Sky-Bridge Siege.
+
+Runs one GameState at a fixed tick for several defenders sharing the same wall
+and tower. Clients connect over localhost TCP, send input frames, and receive
+delta-compressed, quantized binary snapshots.
+
+    python skyBridgeServer.py --port 7777 --tick-rate 30
+"""
+import argparse
+import asyncio
+import struct
+import time
+from collections import deque
+
+from skyBridgeConfig import (MAX_GRID_HEIGHT, TOWER_GRID_SIZE, WALL_FRONT_FACE, WALL_HEIGHT,
+                             WAVE_PRESET, WAVE_PRESETS)
+from skyBridgeSiege import GameState
+
+# ================= CONFIGURATION =================
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 7777
+SERVER_TICK_RATE = 30
+QUANT = 4                      # Positions are sent in 1/QUANT world units as int16
+MAX_PENDING_BYTES = 256 * 1024 # Skip snapshots for clients whose socket is this backed up
+MAX_DEFENDERS = 255
+MAX_FRAME_BYTES = 16 * 1024 * 1024  # Largest frame a client will accept; servers only accept INPUT frames
+STATS_INTERVAL = 5.0
+
+# ================= WIRE FORMAT =================
+# Every message is a u32 length prefix followed by the payload; payload[0] is the type.
+MSG_INPUT = 1
+MSG_WELCOME = 2
+MSG_SNAPSHOT = 3
+
+FRAME = struct.Struct('<I')
+INPUT = struct.Struct('<BIBB')          # type, seq, key bits, action bits
+WELCOME = struct.Struct('<BBH')         # type, defender id, tick rate
+HEADER = struct.Struct('<BIIB')         # type, tick, baseline tick, section mask
+SCALARS = struct.Struct('<ibBHBH3h')    # score, lives, tower height, killstreak, flags, nuke scale, nuke pos
+COUNT = struct.Struct('<H')
+BULLET = struct.Struct('<3hB')
+PIECE_CELL = struct.Struct('<bbh')
+
+KEY_BITS = ('w', 's', 'a', 'd', 'left', 'right', 'up', 'down')
+ACTION_FIRE, ACTION_GRENADE, ACTION_NUKE, ACTION_CLICK, ACTION_SLICE, ACTION_CAMERA, ACTION_RESTART = (
+    1 << i for i in range(7))
+ACTION_COMMANDS = ((ACTION_FIRE, 'fire', 0), (ACTION_GRENADE, 'fire', 1), (ACTION_NUKE, 'nuke', None),
+                   (ACTION_CLICK, 'click', None), (ACTION_SLICE, 'slice', None), (ACTION_CAMERA, 'camera', None))
+
+FLAG_GAME_OVER, FLAG_NUKE_ACTIVE, FLAG_NUKE_AVAILABLE = 1, 2, 4
+
+# Snapshot sections, written in bit order when present
+SEC_SCALARS, SEC_LAYERS, SEC_PIECE, SEC_ENEMIES, SEC_BULLETS, SEC_PLAYERS = (1 << i for i in range(6))
+
+# Per-entity fields; only the ones that changed since the baseline are sent
+ENEMY_FIELDS = tuple(struct.Struct(f) for f in ('<h', '<h', '<h', '<B', '<B'))   # x, y, z, state, type
+PLAYER_FIELDS = tuple(struct.Struct(f) for f in ('<h', '<h', '<h', '<H', '<h'))  # x, y, z, yaw, pitch
+ENEMY_ID = struct.Struct('<I')
+PLAYER_ID = struct.Struct('<B')
+
+EMPTY_LAYER = bytes(TOWER_GRID_SIZE * TOWER_GRID_SIZE)
+NO_PIECE = b'\xff'
+
+def new_view():
+    # The baseline every client starts from; also the shape of a decoded client view
+    return {'tick': 0, 'scalars': None, 'layers': [EMPTY_LAYER] * MAX_GRID_HEIGHT, 'piece': NO_PIECE,
+            'enemies': {}, 'bullets': b'', 'players': {}}
+
+def quantize(v):
+    v = int(round(v * QUANT))
+    return -32768 if v < -32768 else 32767 if v > 32767 else v
+
+def frame(payload):
+    return FRAME.pack(len(payload)) + payload
+
+async def read_frame(reader, max_size=MAX_FRAME_BYTES):
+    size, = FRAME.unpack(await reader.readexactly(FRAME.size))
+    # Check the length before reading so a bad prefix cannot make us buffer gigabytes
+    if size > max_size: raise ValueError(f"frame of {size} bytes exceeds {max_size}")
+    return await reader.readexactly(size)
+
+# ================= ENCODING =================
+def _encode_entities(prev, cur, id_struct, fields):
+    body = bytearray(); upserts = 0
+    for eid, vals in cur.items():
+        old = prev.get(eid)
+        if old == vals: continue
+        mask = 0; data = bytearray()
+        for i, v in enumerate(vals):
+            if old is None or old[i] != v:
+                mask |= 1 << i; data += fields[i].pack(v)
+        body += id_struct.pack(eid); body.append(mask); body += data
+        upserts += 1
+    removed = [eid for eid in prev if eid not in cur]
+    if not upserts and not removed: return b''
+    out = bytearray(COUNT.pack(upserts)); out += body; out += COUNT.pack(len(removed))
+    for eid in removed: out += id_struct.pack(eid)
+    return bytes(out)
+
+def encode_snapshot(prev, cur):
+    mask = 0; body = bytearray()
+    if cur['scalars'] != prev['scalars']:
+        mask |= SEC_SCALARS; body += SCALARS.pack(*cur['scalars'])
+    changed = [z for z, layer in enumerate(cur['layers']) if layer != prev['layers'][z]]
+    if changed:
+        mask |= SEC_LAYERS; body.append(len(changed))
+        for z in changed: body.append(z); body += cur['layers'][z]
+    if cur['piece'] != prev['piece']:
+        mask |= SEC_PIECE; body += cur['piece']
+    enemies = _encode_entities(prev['enemies'], cur['enemies'], ENEMY_ID, ENEMY_FIELDS)
+    if enemies:
+        mask |= SEC_ENEMIES; body += enemies
+    # Bullets skip per-entity deltas: every live bullet moves every tick, so an id-keyed
+    # update (4 id + 1 mask + 6 position bytes) would always cost more than resending
+    # the packed 7-byte record, and spawns and removals come for free.
+    if cur['bullets'] != prev['bullets']:
+        mask |= SEC_BULLETS; body += COUNT.pack(len(cur['bullets']) // BULLET.size); body += cur['bullets']
+    players = _encode_entities(prev['players'], cur['players'], PLAYER_ID, PLAYER_FIELDS)
+    if players:
+        mask |= SEC_PLAYERS; body += players
+    return HEADER.pack(MSG_SNAPSHOT, cur['tick'], prev['tick'], mask) + bytes(body)
+
+# ================= DECODING =================
+def _decode_entities(data, offset, entities, id_struct, fields):
+    upserts, = COUNT.unpack_from(data, offset); offset += COUNT.size
+    for _ in range(upserts):
+        eid, = id_struct.unpack_from(data, offset); offset += id_struct.size
+        mask = data[offset]; offset += 1
+        vals = list(entities.get(eid, (0,) * len(fields)))
+        for i, field in enumerate(fields):
+            if mask & (1 << i):
+                vals[i], = field.unpack_from(data, offset); offset += field.size
+        entities[eid] = tuple(vals)
+    removed, = COUNT.unpack_from(data, offset); offset += COUNT.size
+    for _ in range(removed):
+        eid, = id_struct.unpack_from(data, offset); offset += id_struct.size
+        entities.pop(eid, None)
+    return offset
+
+def apply_snapshot(view, data):
+    """Apply an encoded snapshot to a client view built by new_view(). Values stay quantized."""
+    _, tick, baseline, mask = HEADER.unpack_from(data, 0)
+    if baseline != view['tick']:
+        raise ValueError(f"snapshot {tick} is based on tick {baseline}, view is at {view['tick']}")
+    offset = HEADER.size
+    if mask & SEC_SCALARS:
+        view['scalars'] = SCALARS.unpack_from(data, offset); offset += SCALARS.size
+    if mask & SEC_LAYERS:
+        count = data[offset]; offset += 1
+        for _ in range(count):
+            z = data[offset]; offset += 1
+            view['layers'][z] = bytes(data[offset:offset + len(EMPTY_LAYER)]); offset += len(EMPTY_LAYER)
+    if mask & SEC_PIECE:
+        size = 1 if data[offset] == NO_PIECE[0] else 1 + 4 * PIECE_CELL.size
+        view['piece'] = bytes(data[offset:offset + size]); offset += size
+    if mask & SEC_ENEMIES:
+        offset = _decode_entities(data, offset, view['enemies'], ENEMY_ID, ENEMY_FIELDS)
+    if mask & SEC_BULLETS:
+        count, = COUNT.unpack_from(data, offset); offset += COUNT.size
+        view['bullets'] = bytes(data[offset:offset + count * BULLET.size]); offset += count * BULLET.size
+    if mask & SEC_PLAYERS:
+        offset = _decode_entities(data, offset, view['players'], PLAYER_ID, PLAYER_FIELDS)
+    view['tick'] = tick
+    return view
+
+# ================= SERVER STATE =================
+class EntityIds:
+    """Stable network ids for list-based entities.
+
+    Enemies are plain lists with no id field, so they are keyed by object identity.
+    Last tick's objects stay referenced until the next assign(), which keeps CPython
+    from recycling an address for a new enemy while the old one is still mapped.
+    """
+    def __init__(self):
+        self._next = 1
+        self._live = {}
+
+    def assign(self, objs):
+        live = {}; ids = []
+        for o in objs:
+            entry = self._live.get(id(o))
+            if entry is None:
+                entry = (o, self._next); self._next = (self._next + 1) & 0xffffffff or 1
+            live[id(o)] = entry
+            ids.append(entry[1])
+        self._live = live
+        return ids
+
+class Defender:
+    # GameState attributes that belong to one defender; swapped in around update_player()
+    SEAT_FIELDS = ('player_pos', 'yaw', 'pitch', 'keys', 'fps_mode', 'slice_mode',
+                   'camera_pos', 'camera_target', 'hovered_layer', 'hovered_hit')
+
+    def __init__(self, pid, writer):
+        self.pid = pid
+        self.writer = writer
+        self.player_pos = [((pid % 8) - 3.5) * 60, WALL_FRONT_FACE - 15, WALL_HEIGHT + 20]
+        self.yaw = 90.0; self.pitch = 0.0
+        self.keys = dict.fromkeys(KEY_BITS, False)
+        self.fps_mode = False; self.slice_mode = False; self.hovered_layer = -1; self.hovered_hit = None
+        self.camera_pos = [0, -400, 400]; self.camera_target = [0, 300, 100]
+        self.actions = 0
+        self.last_view = new_view()
+        self.bytes_out = 0; self.bytes_in = 0; self.skipped = 0
+
+    def set_keys(self, bits):
+        for i, k in enumerate(KEY_BITS): self.keys[k] = bool(bits & (1 << i))
+
+    def seat(self, game):
+        for f in self.SEAT_FIELDS: setattr(game, f, getattr(self, f))
+
+    def unseat(self, game):
+        for f in self.SEAT_FIELDS: setattr(self, f, getattr(game, f))
+
+class SharedGameState(GameState):
+    """GameState whose enemies chase the nearest of several defenders."""
+    def __init__(self, wave_preset=None):
+        self.defenders = []
+        super().__init__(wave_preset)
+
+    def defender_positions(self):
+        return [d.player_pos for d in self.defenders] or [self.player_pos]
+
+class SiegeServer:
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, tick_rate=SERVER_TICK_RATE, wave_preset=WAVE_PRESET):
+        self.host = host; self.port = port
+        self.tick_rate = tick_rate
+        self.tick_dt = 1.0 / tick_rate
+        self.game = SharedGameState(wave_preset)
+        self.defenders = {}
+        self.enemy_ids = EntityIds()
+        self.tick = 0
+        self.tick_times = deque(maxlen=100000)
+        self._last_bytes_out = 0
+        self._server = None
+        self._handlers = set()
+
+    # --- Simulation ---
+    def build_view(self):
+        game = self.game
+        grid = game.tower_grid
+        flags = ((FLAG_GAME_OVER if game.game_over else 0) | (FLAG_NUKE_ACTIVE if game.nuke_active else 0)
+                 | (FLAG_NUKE_AVAILABLE if game.nuke_available else 0))
+        scalars = (game.score, max(-128, game.lives), game.tower_height, min(game.killstreak, 0xffff), flags,
+                   min(int(game.nuke_scale), 0xffff), *(quantize(v) for v in game.nuke_position))
+        layers = [bytes(grid[x][y][z] for x in range(TOWER_GRID_SIZE) for y in range(TOWER_GRID_SIZE))
+                  for z in range(MAX_GRID_HEIGHT)]
+        piece = NO_PIECE
+        t = game.active_tetris
+        if t:
+            piece = bytes([t['color_idx']]) + b''.join(
+                PIECE_CELL.pack(x, y, quantize(z))
+                for x, y, z in game.get_shape_cells(t['shape_idx'], t['rotation'], t['x'], t['y'], t['z']))
+        ids = self.enemy_ids.assign(game.enemies)
+        enemies = {eid: (quantize(e[0]), quantize(e[1]), quantize(e[2]), e[3], e[5])
+                   for eid, e in zip(ids, game.enemies)}
+        bullets = b''.join(BULLET.pack(quantize(b[0]), quantize(b[1]), quantize(b[2]), b[6]) for b in game.bullets)
+        players = {d.pid: (quantize(d.player_pos[0]), quantize(d.player_pos[1]), quantize(d.player_pos[2]),
+                           int(d.yaw % 360 * 65536 / 360) & 0xffff, int(round(d.pitch * 100)))
+                   for d in self.defenders.values()}
+        return {'tick': self.tick, 'scalars': scalars, 'layers': layers, 'piece': piece,
+                'enemies': enemies, 'bullets': bullets, 'players': players}
+
+    def step(self):
+        game = self.game
+        restart = False
+        if not self.defenders:
+            return   # Hold the siege until someone joins; enemies would otherwise chase a phantom
+        if not game.game_over:
+            for d in self.defenders.values():
+                d.seat(game)
+                for bit, cmd, arg in ACTION_COMMANDS:
+                    if d.actions & bit: game.handle_input(cmd, arg)
+                game.update_player(self.tick_dt)
+                d.unseat(game)
+                d.actions = 0
+            game.defenders = list(self.defenders.values())
+            game.update_world(self.tick_dt)
+        else:
+            for d in self.defenders.values():
+                restart = restart or bool(d.actions & ACTION_RESTART)
+                d.actions = 0
+        if restart:
+            print("[SERVER] Restarting siege")
+            self.game = SharedGameState(self.game.waves.name)
+
+    def broadcast(self, view):
+        encoded = {}
+        for d in self.defenders.values():
+            if d.writer.transport.get_write_buffer_size() > MAX_PENDING_BYTES:
+                d.skipped += 1; continue
+            # Clients that received the same baseline share one encoding
+            baseline = d.last_view
+            data = encoded.get(baseline['tick'])
+            if data is None: data = encoded[baseline['tick']] = frame(encode_snapshot(baseline, view))
+            d.writer.write(data)
+            d.bytes_out += len(data)
+            d.last_view = view
+
+    def run_tick(self):
+        start = time.perf_counter()
+        self.tick += 1
+        self.step()
+        self.broadcast(self.build_view())
+        self.tick_times.append(time.perf_counter() - start)
+
+    # --- Networking ---
+    async def handle_client(self, reader, writer):
+        pid = next((i for i in range(1, MAX_DEFENDERS + 1) if i not in self.defenders), None)
+        if pid is None:
+            writer.close(); return
+        d = self.defenders[pid] = Defender(pid, writer)
+        self._handlers.add(asyncio.current_task())
+        writer.write(frame(WELCOME.pack(MSG_WELCOME, pid, self.tick_rate)))
+        print(f"[SERVER] Defender {pid} joined ({len(self.defenders)} connected)")
+        try:
+            while True:
+                payload = await read_frame(reader, INPUT.size)
+                d.bytes_in += FRAME.size + len(payload)
+                # Clients only ever send input frames; anything else is a protocol error
+                if len(payload) != INPUT.size or payload[0] != MSG_INPUT:
+                    raise ValueError(f"expected a {INPUT.size}-byte input frame, got {len(payload)} bytes")
+                _, seq, keys, actions = INPUT.unpack(payload)
+                d.set_keys(keys); d.actions |= actions
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except (ValueError, struct.error) as exc:
+            print(f"[SERVER] Dropping defender {pid}: {exc}")
+        finally:
+            del self.defenders[pid]
+            self._handlers.discard(asyncio.current_task())
+            writer.close()
+            print(f"[SERVER] Defender {pid} left ({len(self.defenders)} connected)")
+
+    async def start(self):
+        self._server = await asyncio.start_server(self.handle_client, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        print(f"[SERVER] Listening on {self.host}:{self.port} at {self.tick_rate} Hz")
+
+    async def run(self, log_stats=True):
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time(); next_stats = next_tick + STATS_INTERVAL
+        while True:
+            self.run_tick()
+            next_tick += self.tick_dt
+            now = loop.time()
+            if log_stats and now >= next_stats:
+                self.log_stats(STATS_INTERVAL); next_stats = now + STATS_INTERVAL
+            if next_tick < now: next_tick = now
+            await asyncio.sleep(next_tick - now)
+
+    def log_stats(self, window):
+        recent = sorted(list(self.tick_times)[-int(window * self.tick_rate):])
+        total_out = sum(d.bytes_out for d in self.defenders.values())
+        sent, self._last_bytes_out = total_out - self._last_bytes_out, total_out
+        if not recent or not self.defenders: return
+        mean = sum(recent) / len(recent) * 1000
+        p95 = recent[min(len(recent) - 1, int(len(recent) * 0.95))] * 1000
+        rate = sent / len(self.defenders) / window / 1024
+        print(f"[SERVER] tick mean {mean:.2f} ms, p95 {p95:.2f} ms, {rate:.1f} kB/s per client")
+
+    async def close(self):
+        if self._server:
+            self._server.close(); await self._server.wait_closed()
+        for d in list(self.defenders.values()): d.writer.close()
+        await asyncio.gather(*self._handlers, return_exceptions=True)
+
+async def serve(host, port, tick_rate, wave_preset):
+    server = SiegeServer(host, port, tick_rate, wave_preset)
+    await server.start()
+    await server.run()
+
+def main():
+    parser = argparse.ArgumentParser(description="Sky-Bridge Siege authoritative server")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--tick-rate', type=int, default=SERVER_TICK_RATE)
+    parser.add_argument('--waves', choices=sorted(WAVE_PRESETS), default=WAVE_PRESET)
+    args = parser.parse_args()
+    try: asyncio.run(serve(args.host, args.port, args.tick_rate, args.waves))
+    except KeyboardInterrupt: pass
+
+if __name__ == "__main__":
+    main()
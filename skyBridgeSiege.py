@@ -1,77 +1,24 @@
-from OpenGL.GL import *
-from OpenGL.GLUT import *
-from OpenGL.GLU import *
+import argparse
+import heapq
 import math
+import multiprocessing
+import os
+import queue
 import random
 import time
+from collections import deque, namedtuple
 
-# ================= CONFIGURATION =================
-WINDOW_WIDTH, WINDOW_HEIGHT = 1000, 800
-FOV_Y = 60
-
-# --- Geometry Constants ---
-BLOCK_SIZE = 40  
-TOWER_LIMIT = 15 
-MAX_GRID_HEIGHT = TOWER_LIMIT + 20 
-WALL_HEIGHT = TOWER_LIMIT * BLOCK_SIZE 
-WALL_CENTER_Y = -50
-WALL_THICKNESS = 40
-WALL_FRONT_FACE = WALL_CENTER_Y + (WALL_THICKNESS / 2)
-
-TOWER_GRID_SIZE = 4
-TOWER_CENTER_Y = 300
-TOWER_CENTER_X = 0
-
-# Colors
-COLOR_BG = (0.05, 0.05, 0.1)
-COLOR_WALL = (0.3, 0.3, 0.4)
-COLOR_PLAYER = (0.0, 1.0, 0.0)
-COLOR_GUN = (0.0, 0.8, 0.8)
-COLOR_ENEMY = (1.0, 0.0, 0.0)
-COLOR_SUMMONER = (0.8, 0.0, 0.0) 
-COLOR_BULLET = (1.0, 1.0, 0.0)
-COLOR_GRENADE = (0.0, 0.8, 0.0)
-COLOR_ZONE = (0.5, 0.0, 0.0)
-COLOR_HIGHLIGHT_VALID = (0.0, 1.0, 0.0, 0.6)    
-COLOR_HIGHLIGHT_INVALID = (1.0, 0.0, 0.0, 0.3) 
-
-# Tetris colors
-TETRIS_COLORS = [
-    (0.0, 0.8, 0.8), (0.0, 0.0, 1.0), (0.8, 0.4, 0.0), 
-    (0.8, 0.8, 0.0), (0.5, 0.0, 0.8), (1.0, 0.0, 0.0), (0.0, 0.8, 0.0)
-]
-
-# Tetris shapes
-TETRIS_SHAPES = [
-    [(0,0), (1,0), (2,0), (3,0)], # I (0)
-    [(0,0), (1,0), (0,1), (1,1)], # O (1)
-    [(1,0), (0,1), (1,1), (2,1)], # T (2)
-    [(0,0), (0,1), (1,1), (2,1)], # L (3)
-    [(2,0), (0,1), (1,1), (2,1)], # J (4)
-    [(1,0), (2,0), (0,1), (1,1)], # S (5)
-    [(0,0), (1,0), (1,1), (2,1)]  # Z (6)
-]
-
-# Global game instance
-game = None
+# OpenGL is imported by skyBridgeGL, and only when main() opens a window
+from skyBridgeConfig import *
+
+# The simulation driving the game, its quality governor, and the render backend
+sim = None
+governor = None
+gfx = None
 
 # ================= UTILITY FUNCTIONS =================
-def draw_text(x, y, text, color=(1, 1, 1), font=GLUT_BITMAP_HELVETICA_18):
-    glColor3f(*color)
-    glMatrixMode(GL_PROJECTION)
-    glPushMatrix()
-    glLoadIdentity()
-    gluOrtho2D(0, 1000, 0, 800)
-    glMatrixMode(GL_MODELVIEW)
-    glPushMatrix()
-    glLoadIdentity()
-    glRasterPos2f(x, y)
-    for ch in text:
-        glutBitmapCharacter(font, ord(ch))
-    glPopMatrix()
-    glMatrixMode(GL_PROJECTION)
-    glPopMatrix()
-    glMatrixMode(GL_MODELVIEW)
+def draw_text(x, y, text, color=(1, 1, 1)):
+    gfx.text(x, y, text, color)
 
 # ================= PARTICLE SYSTEM =================
 class Particle:
@@ -91,9 +38,246 @@ class Particle:
         self.lifetime -= dt
         return self.lifetime <= 0
 
+# ================= RENDER SNAPSHOT =================
+# Immutable copy of everything the display callback needs. Built by the
+# simulation after each tick so rendering never touches live GameState.
+RenderSnapshot = namedtuple('RenderSnapshot', [
+    'camera_pos', 'camera_target', 'player_pos', 'yaw', 'pitch', 'fps_mode',
+    'score', 'lives', 'killstreak', 'grenades', 'tower_height',
+    'nuke_available', 'nuke_active', 'nuke_position', 'nuke_scale',
+    'game_over', 'game_over_reason', 'cheat_mode', 'debug_mode',
+    'slice_mode', 'hovered_layer', 'hovered_cell', 'solid_layers',
+    'blocks',           # ((x, y, z, color_idx + 1, exposed), ...)
+    'falling_cells',    # ((x, y, z), ...) of the active piece
+    'falling_color',    # color index of the active piece, or -1
+    'wave',             # 1-based wave number
+    'enemies',          # ((x, y, z, type), ...)
+    'bullets',          # ((x, y, z, type), ...)
+    'particles',        # (((x, y, z), color), ...)
+])
+
+# ================= WAVES =================
+class WaveScheduler:
+    def __init__(self, preset=WAVE_PRESET):
+        self.name = preset
+        self.preset = WAVE_PRESETS[preset]
+        self.intermission = 0.0
+        self.start_wave(0)
+
+    def wave_spec(self, n):
+        waves = self.preset['waves']
+        if n < len(waves): return waves[n]
+        last = waves[-1]
+        count = int(last['count'] * self.preset['ramp'] ** (n - len(waves) + 1))
+        return dict(last, count=min(count, self.preset['max_count']))
+
+    def start_wave(self, n):
+        self.wave = n
+        self.spec = self.wave_spec(n)
+        self.remaining = self.spec['count']
+        self.spawn_credit = 0.0
+        self.kinds = [ENEMY_TYPE_INDEX[name] for name in self.spec['mix']]
+        self.weights = list(self.spec['mix'].values())
+        print(f"[WAVES] Wave {n + 1}: {self.remaining} enemies")
+
+    def make_enemy(self):
+        kind = random.choices(self.kinds, self.weights)[0]
+        angle = random.uniform(0, 2 * math.pi); radius = random.uniform(*self.preset['ring'])
+        x = math.cos(angle) * radius; y = TOWER_CENTER_Y + math.sin(angle) * radius
+        return [x, y, 0, 0, random.uniform(*ENEMY_TYPES[kind]['speed']), kind]
+
+    def update(self, game, dt):
+        if self.remaining > 0:
+            # Credit is capped at the budget so a long tick cannot release a burst
+            self.spawn_credit = min(self.spawn_credit + self.spec['rate'] * dt, self.preset['budget'])
+            n = min(int(self.spawn_credit), self.remaining)
+            for _ in range(n): game.enemies.append(self.make_enemy())
+            self.spawn_credit -= n; self.remaining -= n
+            return
+        if game.enemies and not self.preset['overlap']: return
+        self.intermission += dt
+        if self.intermission >= self.preset['intermission']:
+            self.intermission = 0.0
+            self.start_wave(self.wave + 1)
+
+# ================= PICKING =================
+# Result of a ray cast into the tower grid: distance along the ray (in units of the
+# ray direction), grid cell (x, y, layer), and the outward normal of the face entered.
+TowerHit = namedtuple('TowerHit', ['t', 'cell', 'face'])
+
+# ================= NAVIGATION =================
+def nav_cell(x, y):
+    col = int((x + ARENA_HALF) // NAV_CELL); row = int((y + ARENA_HALF) // NAV_CELL)
+    col = 0 if col < 0 else NAV_GRID - 1 if col >= NAV_GRID else col
+    row = 0 if row < 0 else NAV_GRID - 1 if row >= NAV_GRID else row
+    return row * NAV_GRID + col
+
+def nav_center(i):
+    return (i % NAV_GRID + 0.5) * NAV_CELL - ARENA_HALF, (i // NAV_GRID + 0.5) * NAV_CELL - ARENA_HALF
+
+NAV_NEIGHBORS = [(dc, dr, math.hypot(dc, dr)) for dc in (-1, 0, 1) for dr in (-1, 0, 1) if dc or dr]
+
+class FlowField:
+    """Integration field over the arena grid, plus per-tick crowd density.
+
+    build() runs Dijkstra from the goal cells and stores, per cell, a unit vector
+    towards the cheapest neighbour. Enemies then sample their cell instead of doing
+    their own pathing, so a tick costs O(cells + enemies).
+    """
+    def __init__(self, blocked, escape=None):
+        n = NAV_GRID * NAV_GRID
+        self.blocked = blocked
+        self.escape = escape or {}     # Fixed directions out of blocked cells
+        self.cost = [math.inf] * n
+        self.dir_x = [0.0] * n; self.dir_y = [0.0] * n
+        self.count = [0] * n
+        self.sum_x = [0.0] * n; self.sum_y = [0.0] * n
+        self.sep_x = [0.0] * n; self.sep_y = [0.0] * n
+        self.occupied = []
+
+    def build(self, seeds, goal_dir=(0.0, 0.0)):
+        n = NAV_GRID * NAV_GRID
+        cost = [math.inf] * n
+        heap = []
+        for i, c in seeds.items():
+            if c < cost[i]: cost[i] = c; heap.append((c, i))
+        heapq.heapify(heap)
+        blocked = self.blocked
+        while heap:
+            c, i = heapq.heappop(heap)
+            if c > cost[i]: continue
+            col, row = i % NAV_GRID, i // NAV_GRID
+            for dc, dr, step in NAV_NEIGHBORS:
+                nc, nr = col + dc, row + dr
+                if not (0 <= nc < NAV_GRID and 0 <= nr < NAV_GRID): continue
+                j = nr * NAV_GRID + nc
+                # No corner cutting past blocked cells
+                if blocked[j] or (dc and dr and (blocked[row * NAV_GRID + nc] or blocked[nr * NAV_GRID + col])): continue
+                if c + step < cost[j]:
+                    cost[j] = c + step; heapq.heappush(heap, (c + step, j))
+        for i in range(n):
+            if blocked[i]:
+                self.dir_x[i], self.dir_y[i] = self.escape.get(i, (0.0, 0.0)); continue
+            if i in seeds:
+                self.dir_x[i], self.dir_y[i] = goal_dir; continue
+            col, row = i % NAV_GRID, i // NAV_GRID
+            best = cost[i]; bx = by = 0.0
+            for dc, dr, step in NAV_NEIGHBORS:
+                nc, nr = col + dc, row + dr
+                if not (0 <= nc < NAV_GRID and 0 <= nr < NAV_GRID): continue
+                # Same no-corner-cutting rule as the search above
+                if dc and dr and (blocked[row * NAV_GRID + nc] or blocked[nr * NAV_GRID + col]): continue
+                if cost[nr * NAV_GRID + nc] < best:
+                    best = cost[nr * NAV_GRID + nc]; bx = dc / step; by = dr / step
+            self.dir_x[i] = bx; self.dir_y[i] = by
+        self.cost = cost
+
+    def clear_density(self):
+        for i in self.occupied:
+            self.count[i] = 0; self.sum_x[i] = 0.0; self.sum_y[i] = 0.0
+            self.sep_x[i] = 0.0; self.sep_y[i] = 0.0
+        self.occupied = []
+
+    def resolve_density(self):
+        # Separation per occupied cell: away from denser neighbours. sum_x/sum_y become centroids.
+        count = self.count
+        last = NAV_GRID - 1
+        for i in self.occupied:
+            col, row = i % NAV_GRID, i // NAV_GRID
+            left = count[i - 1] if col > 0 else 0; right = count[i + 1] if col < last else 0
+            down = count[i - NAV_GRID] if row > 0 else 0; up = count[i + NAV_GRID] if row < last else 0
+            here = count[i]
+            self.sep_x[i] = (left - right) / (here + left + right)
+            self.sep_y[i] = (down - up) / (here + down + up)
+            self.sum_x[i] /= here; self.sum_y[i] /= here
+
+    def steer(self, i, x, y):
+        vx = self.dir_x[i]; vy = self.dir_y[i]
+        if self.count[i] < 2: return vx, vy
+        # Spread out inside the cell too, so a crowd sharing one cell does not stack
+        vx += SEPARATION_WEIGHT * (self.sep_x[i] + (x - self.sum_x[i]) / NAV_CELL)
+        vy += SEPARATION_WEIGHT * (self.sep_y[i] + (y - self.sum_y[i]) / NAV_CELL)
+        length = math.sqrt(vx*vx + vy*vy)
+        if length < 1e-6: return 0.0, 0.0
+        return vx / length, vy / length
+
+class Navigator:
+    """Flow fields for the two enemy phases: crossing the ground to the wall, and
+    hunting defenders on top of it.
+
+    The ground field spans the arena but its seeds only depend on which wall
+    columns defenders stand over, so it is rebuilt when that set changes. The top
+    field covers just the wall-top cells and is rebuilt when a defender changes cell.
+    """
+    def __init__(self):
+        n = NAV_GRID * NAV_GRID
+        face_row = nav_cell(0, WALL_FRONT_FACE) // NAV_GRID
+        tower_half = TOWER_GRID_SIZE * BLOCK_SIZE / 2
+        # Wall columns enemies can climb, and the rows covering the wall top
+        self.columns = [col for col in range(NAV_GRID)
+                        if abs((col + 0.5) * NAV_CELL - ARENA_HALF) < WALL_HALF_WIDTH - NAV_CELL / 2]
+        self.top_rows = range(nav_cell(0, WALL_CENTER_Y - WALL_THICKNESS / 2) // NAV_GRID, face_row + 1)
+        ground_blocked = [False] * n; escape = {}
+        top_blocked = [False] * n; top_escape = {}
+        for i in range(n):
+            cx, cy = nav_center(i)
+            col, row = i % NAV_GRID, i // NAV_GRID
+            if row < face_row:
+                ground_blocked[i] = True; escape[i] = (0.0, 1.0)
+            elif abs(cx - TOWER_CENTER_X) < tower_half + NAV_CELL / 2 and abs(cy - TOWER_CENTER_Y) < tower_half + NAV_CELL / 2:
+                # Tower footprint: push anything caught inside straight out
+                ground_blocked[i] = True
+                ox, oy = cx - TOWER_CENTER_X, cy - TOWER_CENTER_Y; length = math.hypot(ox, oy) or 1.0
+                escape[i] = (ox / length, oy / length)
+            tc, tr = self.clamp_top(col, row)
+            if (tc, tr) != (col, row):
+                # Off the wall top: head back onto it
+                top_blocked[i] = True
+                length = math.hypot(tc - col, tr - row); top_escape[i] = ((tc - col) / length, (tr - row) / length)
+        self.face_row = face_row
+        self.ground = FlowField(ground_blocked, escape)
+        self.top = FlowField(top_blocked, top_escape)
+        self._ground_key = self._top_key = None
+
+    def clamp_top(self, col, row):
+        col = min(max(col, self.columns[0]), self.columns[-1])
+        row = min(max(row, self.top_rows[0]), self.top_rows[-1])
+        return col, row
+
+    def update(self, defenders, enemies):
+        spots = [nav_cell(p[0], p[1]) for p in defenders]
+        ground_key = frozenset(i % NAV_GRID for i in spots)
+        if ground_key != self._ground_key:
+            self._ground_key = ground_key
+            # Ground: reach the wall face, preferring the columns defenders stand over
+            self.ground.build({self.face_row * NAV_GRID + col: min(abs(col - c) for c in ground_key)
+                               for col in self.columns}, goal_dir=(0.0, -1.0))
+        top_key = frozenset(self.clamp_top(i % NAV_GRID, i // NAV_GRID) for i in spots)
+        if top_key != self._top_key:
+            self._top_key = top_key
+            self.top.build({row * NAV_GRID + col: 0.0 for col, row in top_key})
+        # Bin every enemy once; the returned cells line up with `enemies`
+        ground, top = self.ground, self.top
+        ground.clear_density(); top.clear_density()
+        last = NAV_GRID - 1
+        cells = []
+        for e in enemies:
+            x, y, state = e[0], e[1], e[3]
+            col = int((x + ARENA_HALF) // NAV_CELL); row = int((y + ARENA_HALF) // NAV_CELL)
+            col = 0 if col < 0 else last if col > last else col
+            row = 0 if row < 0 else last if row > last else row
+            i = row * NAV_GRID + col
+            cells.append(i)
+            if state == 1: continue
+            f = ground if state == 0 else top
+            if f.count[i] == 0: f.occupied.append(i)
+            f.count[i] += 1; f.sum_x[i] += x; f.sum_y[i] += y
+        ground.resolve_density(); top.resolve_density()
+        return cells
+
 # ================= GAME STATE =================
 class GameState:
-    def __init__(self):
+    def __init__(self, wave_preset=None):
         # Camera
         self.yaw = 90.0   
         self.pitch = 0.0
@@ -126,6 +310,7 @@ class GameState:
         # Abilities
         self.slice_mode = False
         self.hovered_layer = -1
+        self.hovered_hit = None
         
         # Entities
         self.bullets = [] 
@@ -136,6 +321,8 @@ class GameState:
         self.tower_grid = [[[0 for _ in range(MAX_GRID_HEIGHT)] 
                            for _ in range(TOWER_GRID_SIZE)] 
                            for _ in range(TOWER_GRID_SIZE)]
+        # Filled cells per layer; kept in sync by set_cell/remove_layer
+        self.layer_counts = [0] * MAX_GRID_HEIGHT
         
         # Tetris State
         self.active_tetris = None
@@ -151,30 +338,22 @@ class GameState:
         self.keys = {'w': False, 's': False, 'a': False, 'd': False,
                      'left': False, 'right': False, 'up': False, 'down': False}
         
-        self.spawn_enemies()
+        self.waves = WaveScheduler(wave_preset or WAVE_PRESET)
+        self.nav = Navigator()
+        self.quality = QUALITY_LEVELS[0]
         print("[DEBUG] Game Initialized.")
     
     def recalculate_tower_height(self):
         max_z = 0
         for z in range(MAX_GRID_HEIGHT):
-            has_block = False
-            for x in range(TOWER_GRID_SIZE):
-                for y in range(TOWER_GRID_SIZE):
-                    if self.tower_grid[x][y][z] > 0:
-                        has_block = True
-                        break
-            if has_block:
+            if self.layer_counts[z] > 0:
                 max_z = z + 1
         self.tower_height = max_z
 
-    def spawn_enemies(self):
-        self.enemies = []
-        for i in range(5):
-            angle = (i / 5) * 2 * math.pi
-            radius = 100
-            x = math.cos(angle) * radius
-            y = TOWER_CENTER_Y + math.sin(angle) * radius
-            self.enemies.append([x, y, 0, 0, random.uniform(30,50), 0]) 
+    def set_cell(self, x, y, z, value):
+        old = self.tower_grid[x][y][z]
+        if (old > 0) != (value > 0): self.layer_counts[z] += 1 if value > 0 else -1
+        self.tower_grid[x][y][z] = value
 
     def get_smart_piece(self):
         if not self.generation_queue:
@@ -257,25 +436,13 @@ class GameState:
             self.score += 50
 
     def has_blocks_in_layer(self, z):
-        for x in range(TOWER_GRID_SIZE):
-            for y in range(TOWER_GRID_SIZE):
-                if self.tower_grid[x][y][z] > 0: return True
-        return False
+        return self.layer_counts[z] > 0
 
     def is_layer_uneven(self, z):
-        has_block = False
-        has_gap = False
-        for x in range(TOWER_GRID_SIZE):
-            for y in range(TOWER_GRID_SIZE):
-                if self.tower_grid[x][y][z] > 0: has_block = True
-                else: has_gap = True
-        return has_block and has_gap
+        return 0 < self.layer_counts[z] < TOWER_GRID_SIZE * TOWER_GRID_SIZE
 
     def is_layer_solid(self, z):
-        for x in range(TOWER_GRID_SIZE):
-            for y in range(TOWER_GRID_SIZE):
-                if self.tower_grid[x][y][z] == 0: return False
-        return True
+        return self.layer_counts[z] == TOWER_GRID_SIZE * TOWER_GRID_SIZE
 
     def remove_layer(self, layer_z):
         for z in range(layer_z, MAX_GRID_HEIGHT - 1):
@@ -285,6 +452,7 @@ class GameState:
         for x in range(TOWER_GRID_SIZE):
              for y in range(TOWER_GRID_SIZE):
                  self.tower_grid[x][y][MAX_GRID_HEIGHT-1] = 0
+        self.layer_counts.pop(layer_z); self.layer_counts.append(0)
         self.recalculate_tower_height()
 
     def update_tetris(self, dt):
@@ -311,7 +479,7 @@ class GameState:
                 for x, y, z in final_cells:
                     ix, iy, iz = int(x), int(y), int(z)
                     if 0 <= ix < TOWER_GRID_SIZE and 0 <= iy < TOWER_GRID_SIZE and 0 <= iz < MAX_GRID_HEIGHT:
-                        self.tower_grid[ix][iy][iz] = self.active_tetris['color_idx'] + 1
+                        self.set_cell(ix, iy, iz, self.active_tetris['color_idx'] + 1)
                     else: valid_lock = False
                 
                 if valid_lock:
@@ -343,6 +511,12 @@ class GameState:
     def update_bullets(self, dt):
         to_remove = []
         for i, b in enumerate(self.bullets):
+            # Sweep this tick's motion through the tower; blocks stop shots
+            hit = self.raycast_tower(b, (b[3], b[4], b[5]), dt)
+            if hit:
+                to_remove.append(i)
+                if b[6] == 1: self.create_explosion(b[0] + b[3] * hit.t, b[1] + b[4] * hit.t, b[2] + b[5] * hit.t, 150)
+                continue
             b[0] += b[3] * dt; b[1] += b[4] * dt; b[2] += b[5] * dt
             if b[6] == 1: b[5] -= 500 * dt 
             if abs(b[0]) > 600 or abs(b[1]) > 600 or b[2] < 0:
@@ -351,53 +525,85 @@ class GameState:
         for i in sorted(to_remove, reverse=True): self.bullets.pop(i)
 
     def create_explosion(self, x, y, z, radius):
-        for i in range(len(self.enemies) - 1, -1, -1):
-            e = self.enemies[i]
-            dist = math.sqrt((e[0]-x)**2 + (e[1]-y)**2 + (e[2]-z)**2)
-            if dist < radius:
-                self.enemies.pop(i); self.score += 20; self.killstreak += 1
-        for _ in range(30):
+        r2 = radius * radius
+        survivors = [e for e in self.enemies if (e[0]-x)**2 + (e[1]-y)**2 + (e[2]-z)**2 >= r2]
+        killed = len(self.enemies) - len(survivors)
+        if killed:
+            self.enemies = survivors; self.score += 20 * killed; self.killstreak += killed
+        for _ in range(max(1, int(30 * self.quality['particles']))):
             vx = random.uniform(-50, 50); vy = random.uniform(-50, 50); vz = random.uniform(10, 150)
             self.particles.append(Particle([x,y,z], [vx,vy,vz], (1, random.random(), 0)))
 
     def update_enemies(self, dt):
-        to_remove = []
-        for i, e in enumerate(self.enemies):
-            ex, ey, ez, state, speed, offset = e
-            speed = 80 
+        nav = self.nav
+        cells = nav.update(self.defender_positions(), self.enemies)
+        ground, top = nav.ground, nav.top
+        survivors = []
+        for e, i in zip(self.enemies, cells):
+            ex, ey, ez, state, speed, kind = e
             if state == 0: 
-                dy = WALL_FRONT_FACE - ey; dist = abs(dy)
-                if dist > 5: ey += (dy/dist) * speed * dt
-                else: ey = WALL_FRONT_FACE; state = 1
+                vx, vy = ground.steer(i, ex, ey)
+                ex += vx * speed * dt; ey += vy * speed * dt
+                if ey - WALL_FRONT_FACE <= 5: ey = WALL_FRONT_FACE; state = 1
             elif state == 1: 
                 dz = WALL_HEIGHT - ez
                 if abs(dz) > 5: ez += speed * dt
                 else: ez = WALL_HEIGHT; state = 2
             elif state == 2: 
-                dx = self.player_pos[0] - ex; dy = self.player_pos[1] - ey; dist = math.sqrt(dx*dx + dy*dy)
+                if top.cost[i] > 1.5:
+                    vx, vy = top.steer(i, ex, ey)
+                    ex += vx * speed * dt; ey += vy * speed * dt
+                    e[0], e[1] = ex, ey; survivors.append(e)
+                    continue
+                # Within a cell of a defender: home in directly for the final approach
+                tx, ty = self.nearest_defender(ex, ey)
+                dx = tx - ex; dy = ty - ey; dist = math.sqrt(dx*dx + dy*dy)
                 if dist > 5: ex += (dx/dist) * speed * dt; ey += (dy/dist) * speed * dt
                 if dist < 20:
-                    self.lives -= 1; self.kills_without_damage = 0; to_remove.append(i)
+                    self.lives -= ENEMY_TYPES[kind]['damage']; self.kills_without_damage = 0
                     if self.lives <= 0: self.game_over = True; self.game_over_reason = "Killed by enemies!"
+                    continue
             e[0], e[1], e[2], e[3] = ex, ey, ez, state
-        for i in sorted(to_remove, reverse=True): self.enemies.pop(i)
-        while len(self.enemies) < 5 and not self.game_over and not self.nuke_active:
-            angle = random.uniform(0, 2 * math.pi); radius = 120
-            x = math.cos(angle) * radius; y = TOWER_CENTER_Y + math.sin(angle) * radius
-            self.enemies.append([x, y, 0, 0, random.uniform(30,50), 0])
+            survivors.append(e)
+        self.enemies = survivors
+        if not self.game_over and not self.nuke_active:
+            self.waves.update(self, dt)
+
+    def defender_positions(self):
+        return [self.player_pos]
+
+    def nearest_defender(self, x, y):
+        best = None; best_d = None
+        for p in self.defender_positions():
+            d = (p[0]-x)**2 + (p[1]-y)**2
+            if best is None or d < best_d: best = p; best_d = d
+        return best[0], best[1]
 
     def check_collisions(self):
-        b_rem, e_rem = [], []
-        for i, b in enumerate(self.bullets):
-            if b[6] == 1: continue 
+        b_rem, e_rem = set(), set()
+        live = [i for i, b in enumerate(self.bullets) if b[6] != 1]
+        if live and self.enemies:
+            # Bin enemies on the nav grid once per tick. A hit is under 20 units and a
+            # cell is NAV_CELL wide, so each bullet only needs its own and adjacent cells.
+            bins = {}
             for j, e in enumerate(self.enemies):
-                dist = math.sqrt((b[0]-e[0])**2 + (b[1]-e[1])**2 + (b[2]-e[2])**2)
-                if dist < 20:
-                    if i not in b_rem: b_rem.append(i)
-                    if j not in e_rem: e_rem.append(j)
-                    self.score += 10; self.killstreak += 1; self.kills_without_damage += 1
-        for i in sorted(b_rem, reverse=True): self.bullets.pop(i)
-        for j in sorted(e_rem, reverse=True): self.enemies.pop(j)
+                i = nav_cell(e[0], e[1])
+                if i in bins: bins[i].append(j)
+                else: bins[i] = [j]
+            enemies = self.enemies
+            for i in live:
+                b = self.bullets[i]
+                bx, by, bz = b[0], b[1], b[2]
+                row, col = divmod(nav_cell(bx, by), NAV_GRID)
+                for r in range(max(row - 1, 0), min(row + 2, NAV_GRID)):
+                    for c in range(max(col - 1, 0), min(col + 2, NAV_GRID)):
+                        for j in bins.get(r * NAV_GRID + c, ()):
+                            e = enemies[j]
+                            if (bx-e[0])**2 + (by-e[1])**2 + (bz-e[2])**2 < 400:
+                                b_rem.add(i); e_rem.add(j)
+                                self.score += ENEMY_TYPES[e[5]]['score']; self.killstreak += 1; self.kills_without_damage += 1
+        if b_rem: self.bullets = [b for i, b in enumerate(self.bullets) if i not in b_rem]
+        if e_rem: self.enemies = [e for j, e in enumerate(self.enemies) if j not in e_rem]
         if self.kills_without_damage >= 10 and self.grenades < 2:
             self.grenades = 2; self.kills_without_damage = 0; print("[REWARD] Grenades added!")
         if self.killstreak >= 20 and not self.nuke_available:
@@ -415,73 +621,88 @@ class GameState:
             self.yaw = math.degrees(math.atan2(dy, dx)); self.pitch = math.degrees(math.atan2(dz, dist_horiz))
             if time.time() - self.last_cheat_fire > 0.15: self.fire_bullet(0); self.last_cheat_fire = time.time()
 
+    def raycast_tower(self, origin, direction, max_t=math.inf):
+        # 3D DDA (Amanatides-Woo) through the tower grid. Visits only the cells the ray
+        # crosses and returns the first filled one as a TowerHit, or None.
+        if self.tower_height == 0: return None
+        half = TOWER_GRID_SIZE / 2
+        o = ((origin[0] - TOWER_CENTER_X) / BLOCK_SIZE + half,
+             (origin[1] - TOWER_CENTER_Y) / BLOCK_SIZE + half,
+             origin[2] / BLOCK_SIZE)
+        d = (direction[0] / BLOCK_SIZE, direction[1] / BLOCK_SIZE, direction[2] / BLOCK_SIZE)
+        size = (TOWER_GRID_SIZE, TOWER_GRID_SIZE, self.tower_height)
+
+        # Clip against the occupied bounding box (slab test), remembering the entry face
+        t_enter, t_exit, face = 0.0, max_t, None
+        for axis in range(3):
+            if abs(d[axis]) < 1e-12:
+                if not 0 <= o[axis] <= size[axis]: return None
+                continue
+            t0 = -o[axis] / d[axis]; t1 = (size[axis] - o[axis]) / d[axis]
+            normal = -1 if d[axis] > 0 else 1
+            if t0 > t1: t0, t1 = t1, t0
+            if t0 > t_enter:
+                t_enter = t0; face = tuple(normal if a == axis else 0 for a in range(3))
+            t_exit = min(t_exit, t1)
+            if t_enter > t_exit: return None
+
+        cell = []; step = []; t_max = []; t_delta = []
+        for axis in range(3):
+            p = o[axis] + d[axis] * t_enter
+            c = min(max(int(math.floor(p)), 0), size[axis] - 1)
+            cell.append(c)
+            if d[axis] > 0:
+                step.append(1); t_max.append(t_enter + (c + 1 - p) / d[axis]); t_delta.append(1 / d[axis])
+            elif d[axis] < 0:
+                step.append(-1); t_max.append(t_enter + (c - p) / d[axis]); t_delta.append(-1 / d[axis])
+            else:
+                step.append(0); t_max.append(math.inf); t_delta.append(math.inf)
+
+        t = t_enter
+        grid = self.tower_grid
+        while True:
+            if grid[cell[0]][cell[1]][cell[2]] > 0:
+                return TowerHit(t, tuple(cell), face)
+            axis = 0 if t_max[0] <= t_max[1] and t_max[0] <= t_max[2] else (1 if t_max[1] <= t_max[2] else 2)
+            t = t_max[axis]
+            if t > t_exit: return None
+            cell[axis] += step[axis]
+            if not 0 <= cell[axis] < size[axis]: return None
+            t_max[axis] += t_delta[axis]
+            face = tuple(-step[axis] if a == axis else 0 for a in range(3))
+
     def update_slice_target(self):
         if not self.slice_mode: 
             self.hovered_layer = -1
+            self.hovered_hit = None
             return
         
-        # Calculate Ray Direction (Player Forward)
-        rad_yaw = math.radians(self.yaw)
-        rad_pitch = math.radians(self.pitch)
-        dx = math.cos(rad_yaw) * math.cos(rad_pitch)
-        dy = math.sin(rad_yaw) * math.cos(rad_pitch)
-        dz = math.sin(rad_pitch)
-        
-        best_dist = 99999
-        selected_z = -1
-        
-        # Ray cast against all layers
-        for z in range(self.tower_height):
-            # Ignore non-solid layers
-            if not self.is_layer_solid(z): continue 
-            
-            layer_center_z = (z + 0.5) * BLOCK_SIZE
-            
-            # Avoid division by zero
-            if abs(dz) < 0.001: continue
-            
-            # Calculate distance to the layer's center plane
-            t = (layer_center_z - self.camera_pos[2]) / dz
-            
-            # Check if this layer is closer than previous find and in front of camera
-            if t > 0 and t < best_dist:
-                # Calculate intersection point (World Space)
-                ix = self.camera_pos[0] + t * dx
-                iy = self.camera_pos[1] + t * dy
-                
-                # Bounding Box of Tower (Relative to tower center)
-                grid_half_w = (TOWER_GRID_SIZE * BLOCK_SIZE) / 2
-                
-                # FIX: Increased tolerance (tol) from 5 to 40 (BLOCK_SIZE)
-                # This makes it much easier to select the layer
-                tol = 40 
-                min_x = -grid_half_w - tol
-                max_x = grid_half_w + tol
-                min_y = TOWER_CENTER_Y - grid_half_w - tol
-                max_y = TOWER_CENTER_Y + grid_half_w + tol
-                
-                if min_x <= ix <= max_x and min_y <= iy <= max_y:
-                    best_dist = t
-                    selected_z = z
-                    
-        self.hovered_layer = selected_z
+        # Cast the crosshair ray: the crosshair sits at screen centre, which is the
+        # camera's look direction. The player's own aim differs in both camera modes.
+        cx, cy, cz = self.camera_pos; tx, ty, tz = self.camera_target
+        dx, dy, dz = tx - cx, ty - cy, tz - cz
+        length = math.sqrt(dx*dx + dy*dy + dz*dz) or 1.0
+        hit = self.raycast_tower(self.camera_pos, (dx / length, dy / length, dz / length))
+        self.hovered_hit = hit
+        # Only solid layers can be sliced
+        self.hovered_layer = hit.cell[2] if hit and self.is_layer_solid(hit.cell[2]) else -1
 
     def perform_slice(self):
         # Force an update right before clicking to ensure accuracy
         self.update_slice_target()
         
         if self.hovered_layer != -1:
-            if self.is_layer_solid(self.hovered_layer):
-                print(f"[ACTION] Sliced solid layer {self.hovered_layer}")
-                # Create explosion effect
-                self.create_explosion(TOWER_CENTER_X, TOWER_CENTER_Y, (self.hovered_layer+0.5)*BLOCK_SIZE, 150)
-                # Remove the layer
-                self.remove_layer(self.hovered_layer)
-                self.score += 50
-                # Reset selection immediately to prevent double clicks
-                self.hovered_layer = -1
-            else:
-                print("[ACTION] Cannot slice uneven layer!")
+            print(f"[ACTION] Sliced solid layer {self.hovered_layer}")
+            # Create explosion effect
+            self.create_explosion(TOWER_CENTER_X, TOWER_CENTER_Y, (self.hovered_layer+0.5)*BLOCK_SIZE, 150)
+            # Remove the layer
+            self.remove_layer(self.hovered_layer)
+            self.score += 50
+            # Reset selection immediately to prevent double clicks
+            self.hovered_layer = -1
+            self.hovered_hit = None
+        elif self.hovered_hit:
+            print("[ACTION] Cannot slice uneven layer!")
         else:
             print("[ACTION] No target selected! Aim directly at the solid green blocks.")
 
@@ -491,6 +712,7 @@ class GameState:
             self.nuke_timer = 3.0; self.nuke_scale = 0; self.nuke_position = [0, TOWER_CENTER_Y, 500] 
             self.enemies.clear(); self.tower_height = 0
             self.tower_grid = [[[0 for _ in range(MAX_GRID_HEIGHT)] for _ in range(TOWER_GRID_SIZE)] for _ in range(TOWER_GRID_SIZE)]
+            self.layer_counts = [0] * MAX_GRID_HEIGHT
 
     def update_nuke(self, dt):
         if self.nuke_active:
@@ -503,10 +725,70 @@ class GameState:
         for p in self.particles[:]:
             if p.update(dt): self.particles.remove(p)
 
-    def update(self):
+    def handle_input(self, cmd, arg=None):
+        # Applied by the simulation, in the order the window callbacks queued them
+        if cmd == 'key_down':
+            if arg in self.keys: self.keys[arg] = True
+        elif cmd == 'key_up':
+            if arg in self.keys: self.keys[arg] = False
+        elif cmd == 'fire': self.fire_bullet(arg)
+        elif cmd == 'click':
+            if self.slice_mode: self.perform_slice()
+            else: self.fire_bullet(0)
+        elif cmd == 'nuke': self.use_nuke()
+        elif cmd == 'restart': self.__init__(self.waves.name)
+        elif cmd == 'pause': self.paused = not self.paused
+        elif cmd == 'cheat': self.cheat_mode = not self.cheat_mode
+        elif cmd == 'slice': self.slice_mode = not self.slice_mode
+        elif cmd == 'debug': self.debug_mode = not self.debug_mode
+        elif cmd == 'camera': self.fps_mode = not self.fps_mode
+
+    def snapshot(self):
+        blocks = []
+        grid = self.tower_grid
+        last = TOWER_GRID_SIZE - 1
+        for x in range(TOWER_GRID_SIZE):
+            for y in range(TOWER_GRID_SIZE):
+                column = grid[x][y]
+                for z in range(self.tower_height):
+                    if column[z] > 0:
+                        # Hidden when boxed in on every side (the ground covers the bottom layer)
+                        hidden = (0 < x < last and 0 < y < last and z + 1 < MAX_GRID_HEIGHT and column[z+1] > 0 and (z == 0 or column[z-1] > 0)
+                                  and grid[x-1][y][z] > 0 and grid[x+1][y][z] > 0
+                                  and grid[x][y-1][z] > 0 and grid[x][y+1][z] > 0)
+                        blocks.append((x, y, z, column[z], not hidden))
+        falling_cells = ()
+        falling_color = -1
+        if self.active_tetris:
+            t = self.active_tetris
+            falling_cells = tuple(self.get_shape_cells(t['shape_idx'], t['rotation'], t['x'], t['y'], t['z']))
+            falling_color = t['color_idx']
+        return RenderSnapshot(
+            camera_pos=tuple(self.camera_pos), camera_target=tuple(self.camera_target),
+            player_pos=tuple(self.player_pos), yaw=self.yaw, pitch=self.pitch, fps_mode=self.fps_mode,
+            score=self.score, lives=self.lives, killstreak=self.killstreak, grenades=self.grenades,
+            tower_height=self.tower_height,
+            nuke_available=self.nuke_available, nuke_active=self.nuke_active,
+            nuke_position=tuple(self.nuke_position), nuke_scale=self.nuke_scale,
+            game_over=self.game_over, game_over_reason=self.game_over_reason,
+            cheat_mode=self.cheat_mode, debug_mode=self.debug_mode,
+            slice_mode=self.slice_mode, hovered_layer=self.hovered_layer,
+            hovered_cell=self.hovered_hit.cell if self.hovered_hit else None,
+            solid_layers=frozenset(z for z in range(self.tower_height) if self.is_layer_solid(z)),
+            blocks=tuple(blocks), falling_cells=falling_cells, falling_color=falling_color,
+            wave=self.waves.wave + 1,
+            enemies=tuple((e[0], e[1], e[2], e[5]) for e in self.enemies),
+            bullets=tuple((b[0], b[1], b[2], b[6]) for b in self.bullets),
+            particles=tuple((tuple(p.position), p.color) for p in self.particles),
+        )
+
+    def update(self, dt):
         if self.game_over or self.paused: return
-        curr_time = time.time(); dt = curr_time - getattr(self, '_last_t', curr_time); self._last_t = curr_time
-        
+        self.update_player(dt)
+        self.update_world(dt)
+
+    def update_player(self, dt):
+        # Movement, aim and camera for whoever currently owns player_pos/yaw/pitch/keys
         rs = 120 * dt
         if self.keys['left']: self.yaw += rs
         if self.keys['right']: self.yaw -= rs
@@ -538,282 +820,584 @@ class GameState:
 
         self.update_cheat_mode()
         self.update_slice_target() 
+
+    def update_world(self, dt):
         self.update_tetris(dt)
         self.update_bullets(dt)
         self.update_enemies(dt)
         self.update_nuke(dt)
         self.update_particles(dt)
-        self.check_collisions() 
+        self.check_collisions()
+
+# ================= QUALITY GOVERNOR =================
+class QualityGovernor:
+    """Keeps frame and tick times under target with two independent knobs.
+
+    Frame times come from the display callback and step through QUALITY_LEVELS,
+    which only change render and particle work. Tick times come from the simulation
+    worker and only move the substep count between 1 and MAX_SUBSTEPS, the one
+    setting that changes tick cost. A knob is restored only when the estimated
+    cost of the better setting still leaves QUALITY_HEADROOM, so a restore cannot
+    immediately go back over budget. Substep cost scales with the count; the cost
+    ratio between two quality levels is measured from the first full window after
+    each switch between them. Every decision is logged with the averages behind it.
+    """
+    def __init__(self, target_ms=FRAME_TARGET_MS):
+        self.frame_budget = target_ms / 1000
+        self.tick_budget = self.frame_budget * TICK_SHARE
+        self.level = 0
+        self.settings = QUALITY_LEVELS[0]
+        self.substeps = 1
+        self.frame_times = deque(maxlen=QUALITY_WINDOW)
+        self.tick_times = deque(maxlen=QUALITY_WINDOW)
+        self.last_level_change = self.last_substep_change = 0.0
+        self.level_cost = {}        # level -> frame time at level / frame time at level + 1
+        self._switched_from = None  # (level, average frame time) until the new level is measured
+
+    def record_tick(self, seconds):
+        self.tick_times.append(seconds)
+
+    def record_frame(self, seconds):
+        self.frame_times.append(seconds)
+        self.evaluate()
+
+    def evaluate(self, now=None):
+        now = time.perf_counter() if now is None else now
+        frames = tuple(self.frame_times); ticks = tuple(self.tick_times)
+        if len(frames) == QUALITY_WINDOW and now - self.last_level_change >= QUALITY_COOLDOWN:
+            frame = sum(frames) / len(frames)
+            if self._switched_from:
+                # First full window since a switch: record the better level's cost ratio
+                old, old_frame = self._switched_from; self._switched_from = None
+                ratio = old_frame / frame if old < self.level else frame / old_frame
+                self.level_cost[min(old, self.level)] = max(1.0, ratio)
+            # Estimated frame time one level up; a switch is always measured before this runs
+            restored = frame * self.level_cost.get(self.level - 1, 1.0)
+            if frame > self.frame_budget and self.level < len(QUALITY_LEVELS) - 1:
+                self.set_level(self.level + 1, frame, now)
+            elif self.level > 0 and restored < self.frame_budget * QUALITY_HEADROOM:
+                self.set_level(self.level - 1, frame, now)
+        if len(ticks) == QUALITY_WINDOW and now - self.last_substep_change >= QUALITY_COOLDOWN:
+            tick = sum(ticks) / len(ticks)
+            # Tick cost scales with the substep count
+            if tick > self.tick_budget and self.substeps > 1:
+                self.set_substeps(self.substeps - 1, tick, now)
+            elif (self.substeps < MAX_SUBSTEPS and
+                  tick * (self.substeps + 1) / self.substeps < self.tick_budget * QUALITY_HEADROOM):
+                self.set_substeps(self.substeps + 1, tick, now)
+
+    def set_level(self, level, frame=0.0, now=None):
+        verb = "Lowering" if level > self.level else "Restoring"
+        self._switched_from = (self.level, frame)
+        self.level = level
+        self.settings = QUALITY_LEVELS[level]
+        self.last_level_change = time.perf_counter() if now is None else now
+        self.frame_times.clear()
+        details = ", ".join(f"{k}={v}" for k, v in self.settings.items())
+        print(f"[QUALITY] {verb} to level {level} (frame {frame*1000:.1f} ms / {self.frame_budget*1000:.1f}): {details}")
+
+    def set_substeps(self, substeps, tick=0.0, now=None):
+        verb = "Lowering" if substeps < self.substeps else "Raising"
+        self.substeps = substeps
+        self.last_substep_change = time.perf_counter() if now is None else now
+        self.tick_times.clear()
+        print(f"[QUALITY] {verb} simulation substeps to {substeps} "
+              f"(tick {tick*1000:.2f} ms / {self.tick_budget*1000:.2f})")
+
+# ================= SIMULATION PROCESS =================
+class Simulation:
+    """Steps a GameState at a fixed tick, inline or in a worker process.
+
+    Without start(), step() advances the game in the caller, as the bench does.
+    start() moves the game into a multiprocessing worker so heavy ticks never
+    compete with rendering for the GIL. Commands, quality changes and snapshot
+    requests go down a pipe; the worker replies to each request with the latest
+    snapshot (as a plain tuple) and the tick times since the last one. Only one
+    snapshot is ever in flight, so the worker never pickles frames nobody draws.
+    """
+    def __init__(self, game, tick_rate=TICK_RATE, governor=None):
+        self.game = game
+        self.governor = governor
+        self.tick_rate = tick_rate
+        self.tick_dt = 1.0 / tick_rate
+        self.quality = QUALITY_LEVELS[0]
+        self.substeps = 1
+        self.inputs = queue.SimpleQueue()
+        self.tick_times = deque(maxlen=QUALITY_WINDOW)   # Only the governor window is ever needed
+        self._snapshot = game.snapshot()
+        self._published = self._seen = 0
+        self._conn = None
+        self._process = None
+        self._sent_quality = None
+
+    # --- Front end side ---
+    def post(self, cmd, arg=None):
+        if self._conn: self._conn.send(('input', (cmd, arg)))
+        else: self.inputs.put((cmd, arg))
+
+    def front(self):
+        return self._snapshot
+
+    def poll(self):
+        # True when a snapshot newer than the last poll() is available
+        if self._conn:
+            self._sync_quality()
+            while self._conn.poll():
+                data, ticks = self._conn.recv()
+                self._snapshot = RenderSnapshot(*data); self._published += 1
+                if self.governor:
+                    for t in ticks: self.governor.record_tick(t)
+                self._conn.send(('want', None))
+        fresh = self._published != self._seen
+        self._seen = self._published
+        return fresh
+
+    def _sync_quality(self):
+        if not self.governor: return
+        quality = (self.governor.settings, self.governor.substeps)
+        if quality != self._sent_quality:
+            self._sent_quality = quality
+            self._conn.send(('quality', quality))
+
+    def start(self):
+        # spawn, not fork: the front end may already hold a GL context and window
+        ctx = multiprocessing.get_context('spawn')
+        parent, child = ctx.Pipe()
+        self._process = ctx.Process(target=run_simulation, args=(self.game, self.tick_rate, child),
+                                                name="simulation", daemon=True)
+        self._process.start()
+        child.close()
+        self._conn = parent
+        self._conn.send(('want', None))
+
+    def stop(self):
+        if not self._process: return
+        try: self._conn.send(('stop', None))
+        except (BrokenPipeError, OSError): pass
+        self._process.join(1.0)
+        if self._process.is_alive(): self._process.terminate()
+        self._conn.close()
+        self._process = self._conn = None
+
+    # --- Simulation side ---
+    def publish(self):
+        self._snapshot = self.game.snapshot()
+        self._published += 1
+
+    def drain_inputs(self):
+        while True:
+            try: cmd, arg = self.inputs.get_nowait()
+            except queue.Empty: return
+            self.game.handle_input(cmd, arg)
+
+    def step(self, publish=True):
+        start = time.perf_counter()
+        self.drain_inputs()
+        if self.governor: self.quality, self.substeps = self.governor.settings, self.governor.substeps
+        self.game.quality = self.quality
+        for _ in range(self.substeps):
+            self.game.update(self.tick_dt / self.substeps)
+        if publish: self.publish()
+        elapsed = time.perf_counter() - start
+        if self.governor: self.governor.record_tick(elapsed)
+        else: self.tick_times.append(elapsed)
+
+    def receive(self, conn, timeout):
+        # Handle pipe messages until `timeout` passes; False once told to stop
+        deadline = time.perf_counter() + timeout
+        while True:
+            remaining = deadline - time.perf_counter()
+            if not conn.poll(max(remaining, 0)): return True
+            kind, arg = conn.recv()
+            if kind == 'input': self.inputs.put(arg)
+            elif kind == 'quality': self.quality, self.substeps = arg
+            elif kind == 'want': self._wanted = True
+            elif kind == 'stop': return False
+
+    def serve(self, conn):
+        self._wanted = False
+        next_tick = time.perf_counter()
+        while True:
+            if not self.receive(conn, next_tick - time.perf_counter()): return
+            now = time.perf_counter()
+            # Catch up on missed ticks, but only publish the last one
+            steps = 0
+            while next_tick <= now and steps < MAX_CATCHUP_TICKS:
+                next_tick += self.tick_dt; steps += 1
+                self.step(publish=False)
+            if next_tick <= now:
+                print(f"[SIM] Dropping {int((now - next_tick) / self.tick_dt) + 1} ticks of backlog")
+                next_tick = now + self.tick_dt
+            if self._wanted:
+                self._wanted = False
+                conn.send((tuple(self.game.snapshot()), tuple(self.tick_times)))
+                self.tick_times.clear()
+
+def run_simulation(game, tick_rate, conn):
+    # Worker process entry point; module level so every start method can pickle it.
+    # Rendering wins any contention for a core; an overloaded simulation drops ticks instead.
+    if SIM_NICE and hasattr(os, 'nice'): os.nice(SIM_NICE)
+    try: Simulation(game, tick_rate).serve(conn)
+    except (EOFError, BrokenPipeError, KeyboardInterrupt): pass
+
+# ================= RENDER BACKENDS =================
+# Draw code talks to `gfx`, never to OpenGL directly. skyBridgeGL.GLBackend issues
+# the real immediate-mode calls; RecordingBackend captures them so frames can be
+# measured without a GPU. Both expose the same methods.
+FrameStats = namedtuple('FrameStats', ['draw_calls', 'vertices', 'state_changes', 'transforms', 'calls'])
+
+class RecordingBackend:
+    """Records every backend call and tallies per-frame cost instead of drawing.
+
+    Vertex counts for GLUT/GLU primitives follow the geometry those calls submit:
+    a cube is 6 quads, a sphere is two triangle fans plus stacks-2 quad strips, and
+    a cylinder is `stacks` quad strips. Bitmap glyphs count as one draw call each.
+    Only state calls that actually change the current state count as changes.
+    """
+    def __init__(self):
+        self.frames = []
+        self.lists = {}
+        self.reset()
+
+    def reset(self):
+        self.calls = []
+        self.draw_calls = self.vertices = self.state_changes = self.transforms = 0
+        self.state = {}
+        self._primitive = None
+
+    def _set(self, key, value):
+        if self.state.get(key) != value:
+            self.state[key] = value; self.state_changes += 1
+
+    def frame_stats(self):
+        return FrameStats(self.draw_calls, self.vertices, self.state_changes, self.transforms, len(self.calls))
+
+    @property
+    def last_frame(self):
+        return self.frames[-1] if self.frames else None
+
+    def clear(self):
+        self.calls.append(('clear', ()))
+
+    def look_at(self, eye, target):
+        self.calls.append(('look_at', (eye, target))); self.transforms += 1
+
+    def push_matrix(self): self.calls.append(('push_matrix', ())); self.transforms += 1
+    def pop_matrix(self): self.calls.append(('pop_matrix', ())); self.transforms += 1
+    def translate(self, x, y, z): self.calls.append(('translate', (x, y, z))); self.transforms += 1
+    def scale(self, x, y, z): self.calls.append(('scale', (x, y, z))); self.transforms += 1
+    def rotate(self, angle, x, y, z): self.calls.append(('rotate', (angle, x, y, z))); self.transforms += 1
+
+    def color(self, r, g, b, a=None):
+        self.calls.append(('color', (r, g, b, a))); self._set('color', (r, g, b, 1.0 if a is None else a))
+
+    def blend(self, mode):
+        self.calls.append(('blend', (mode,))); self._set('blend', mode)
+
+    def point_size(self, size):
+        self.calls.append(('point_size', (size,))); self._set('point_size', size)
+
+    # Unbalanced begin/end is a GL error the real backend would silently ignore
+    def begin(self, primitive):
+        assert self._primitive is None, f"begin('{primitive}') inside an open '{self._primitive}'"
+        self.calls.append(('begin', (primitive,))); self._primitive = primitive
+
+    def end(self):
+        assert self._primitive is not None, "end() without begin()"
+        self.calls.append(('end', ())); self.draw_calls += 1; self._primitive = None
+
+    def vertex(self, x, y, z=None):
+        assert self._primitive is not None, "vertex() outside begin()/end()"
+        self.calls.append(('vertex', (x, y, z))); self.vertices += 1
+
+    def solid_cube(self, size):
+        self.calls.append(('solid_cube', (size,))); self.draw_calls += 1; self.vertices += 24
+
+    def solid_sphere(self, radius, slices, stacks):
+        self.calls.append(('solid_sphere', (radius, slices, stacks))); self.draw_calls += 1
+        self.vertices += 2 * (slices + 2) + max(stacks - 2, 0) * 2 * (slices + 1)
+
+    def cylinder(self, base, top, height, slices, stacks):
+        self.calls.append(('cylinder', (base, top, height, slices, stacks))); self.draw_calls += 1
+        self.vertices += stacks * 2 * (slices + 1)
+
+    def begin_overlay(self): self.calls.append(('begin_overlay', ())); self.transforms += 1
+    def end_overlay(self): self.calls.append(('end_overlay', ())); self.transforms += 1
+
+    def text(self, x, y, text, color):
+        self.calls.append(('text', (x, y, text, color)))
+        self._set('color', (*color, 1.0)); self.draw_calls += len(text)
+
+    def cached(self, key, interval, draw):
+        now = time.perf_counter()
+        if interval > 0 and key in self.lists and now - self.lists[key] < interval:
+            # A display list replay is one submission; the colour it leaves behind is unknown
+            self.calls.append(('call_list', (key,))); self.draw_calls += 1
+            self.state.pop('color', None); return
+        if interval > 0: self.lists[key] = now
+        draw()
+
+    def swap_buffers(self):
+        assert self._primitive is None, f"frame ended inside an open '{self._primitive}'"
+        self.calls.append(('swap_buffers', ()))
+        self.frames.append(self.frame_stats())
+        # State persists across frames like a real context; counters do not
+        state = self.state
+        self.reset()
+        self.state = state
 
 # ================= DRAWING =================
 def draw_grid():
-    glBegin(GL_LINES)
-    glColor3f(0.5, 0.5, 0.5)
+    gfx.begin('lines')
+    gfx.color(0.5, 0.5, 0.5)
     for i in range(-600, 601, 100):
-        glVertex3f(i, -600, 0); glVertex3f(i, 600, 0)
-        glVertex3f(-600, i, 0); glVertex3f(600, i, 0)
-    glEnd()
+        gfx.vertex(i, -600, 0); gfx.vertex(i, 600, 0)
+        gfx.vertex(-600, i, 0); gfx.vertex(600, i, 0)
+    gfx.end()
 
 def draw_wall():
-    glPushMatrix()
-    glColor3f(*COLOR_WALL)
-    glTranslatef(0, WALL_CENTER_Y, WALL_HEIGHT/2)
-    glScalef(600, WALL_THICKNESS, WALL_HEIGHT)
-    glutSolidCube(1)
-    glPopMatrix()
-
-def draw_summoners():
-    glPushMatrix()
-    glTranslatef(0, TOWER_CENTER_Y, 0)
-    glColor3f(*COLOR_ZONE)
+    gfx.push_matrix()
+    gfx.color(*COLOR_WALL)
+    gfx.translate(0, WALL_CENTER_Y, WALL_HEIGHT/2)
+    gfx.scale(600, WALL_THICKNESS, WALL_HEIGHT)
+    gfx.solid_cube(1)
+    gfx.pop_matrix()
+
+def lod(n, q):
+    return max(4, int(n * q['sphere_detail']))
+
+def draw_summoners(q):
+    gfx.push_matrix()
+    gfx.translate(0, TOWER_CENTER_Y, 0)
+    gfx.color(*COLOR_ZONE)
     s = TOWER_GRID_SIZE * BLOCK_SIZE / 2 * 2.2 
-    glBegin(GL_QUADS)
-    glVertex3f(-s, -s, 1); glVertex3f(s, -s, 1)
-    glVertex3f(s, s, 1); glVertex3f(-s, s, 1)
-    glEnd()
+    gfx.begin('quads')
+    gfx.vertex(-s, -s, 1); gfx.vertex(s, -s, 1)
+    gfx.vertex(s, s, 1); gfx.vertex(-s, s, 1)
+    gfx.end()
     corners = [(-s, -s), (s, -s), (s, s), (-s, s)]
     for cx, cy in corners:
-        glPushMatrix()
-        glTranslatef(cx, cy, 10)
-        glColor3f(*COLOR_SUMMONER)
-        glutSolidSphere(10, 8, 8) 
-        glBegin(GL_LINES)
-        glColor3f(1, 0, 0)
-        glVertex3f(0,0,0); glVertex3f(0,0,300)
-        glEnd()
-        glPopMatrix()
-    glPopMatrix()
-
-def draw_tower():
+        gfx.push_matrix()
+        gfx.translate(cx, cy, 10)
+        gfx.color(*COLOR_SUMMONER)
+        gfx.solid_sphere(10, lod(8, q), lod(8, q))
+        gfx.begin('lines')
+        gfx.color(1, 0, 0)
+        gfx.vertex(0,0,0); gfx.vertex(0,0,300)
+        gfx.end()
+        gfx.pop_matrix()
+    gfx.pop_matrix()
+
+def draw_tower(s, q):
     # Draw Falling Piece
-    if game.active_tetris:
-        cells = game.get_shape_cells(game.active_tetris['shape_idx'], game.active_tetris['rotation'],
-                                     game.active_tetris['x'], game.active_tetris['y'], game.active_tetris['z'])
-        for x, y, z in cells:
-            glPushMatrix()
-            tx = (x - TOWER_GRID_SIZE/2 + 0.5) * BLOCK_SIZE
-            ty = TOWER_CENTER_Y + (y - TOWER_GRID_SIZE/2 + 0.5) * BLOCK_SIZE
-            tz = (z + 0.5) * BLOCK_SIZE
-            glTranslatef(tx, ty, tz)
-            glColor3f(*TETRIS_COLORS[game.active_tetris['color_idx']])
-            glutSolidCube(BLOCK_SIZE - 2)
-            glPopMatrix()
+    for x, y, z in s.falling_cells:
+        gfx.push_matrix()
+        tx = (x - TOWER_GRID_SIZE/2 + 0.5) * BLOCK_SIZE
+        ty = TOWER_CENTER_Y + (y - TOWER_GRID_SIZE/2 + 0.5) * BLOCK_SIZE
+        tz = (z + 0.5) * BLOCK_SIZE
+        gfx.translate(tx, ty, tz)
+        gfx.color(*TETRIS_COLORS[s.falling_color])
+        gfx.solid_cube(BLOCK_SIZE - 2)
+        gfx.pop_matrix()
             
     # Draw Static Grid
-    for z in range(MAX_GRID_HEIGHT):
-        
+    flicker = 0.5 + 0.5 * math.sin(time.time() * 10) # 0 to 1 pulse
+    cull = q['cull_hidden_blocks']
+    for x, y, z, col, exposed in s.blocks:
         # SLICE VISUAL: Check if this layer is sliceable (Solid)
-        is_solid = game.is_layer_solid(z)
-        is_hovered = (z == game.hovered_layer)
+        is_solid = z in s.solid_layers
+        is_hovered = (z == s.hovered_layer)
+        # Fully enclosed cubes are never seen; only their translucent slice overlay is
+        hidden = cull and not exposed
+        if hidden and not (s.slice_mode and (is_solid or (x, y, z) == s.hovered_cell)): continue
+
+        gfx.push_matrix()
+        tx = (x - TOWER_GRID_SIZE/2 + 0.5) * BLOCK_SIZE
+        ty = TOWER_CENTER_Y + (y - TOWER_GRID_SIZE/2 + 0.5) * BLOCK_SIZE
+        tz = (z + 0.5) * BLOCK_SIZE
+        gfx.translate(tx, ty, tz)
         
-        for x in range(TOWER_GRID_SIZE):
-            for y in range(TOWER_GRID_SIZE):
-                col = game.tower_grid[x][y][z]
-                if col > 0:
-                    glPushMatrix()
-                    tx = (x - TOWER_GRID_SIZE/2 + 0.5) * BLOCK_SIZE
-                    ty = TOWER_CENTER_Y + (y - TOWER_GRID_SIZE/2 + 0.5) * BLOCK_SIZE
-                    tz = (z + 0.5) * BLOCK_SIZE
-                    glTranslatef(tx, ty, tz)
-                    
-                    if game.slice_mode and is_solid:
-                        # Flicker Green Logic
-                        glEnable(GL_BLEND)
-                        glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
-                        
-                        flicker = 0.5 + 0.5 * math.sin(time.time() * 10) # 0 to 1 pulse
-                        
-                        if is_hovered:
-                             glColor4f(0.0, 1.0, 0.0, 0.8) # Bright Green if hovered
-                        else:
-                             glColor4f(0.0, 1.0, 0.0, 0.3 * flicker) # Pulsing Green
-                             
-                        glScalef(1.05, 1.05, 1.05)
-                        glutSolidCube(BLOCK_SIZE)
-                        glScalef(1/1.05, 1/1.05, 1/1.05)
-                        glDisable(GL_BLEND)
-                    
-                    glColor3f(*TETRIS_COLORS[col-1])
-                    glutSolidCube(BLOCK_SIZE - 2)
-                    
-                    glPopMatrix()
-
-def draw_player():
-    if game.fps_mode: return 
-    glPushMatrix()
-    glTranslatef(*game.player_pos)
-    glRotatef(game.yaw - 90, 0, 0, 1) 
-    glColor3f(*COLOR_PLAYER)
-    glutSolidSphere(15, 16, 16)
-    glPushMatrix()
-    glColor3f(*COLOR_GUN)
-    glTranslatef(0, 10, 5)
-    glRotatef(90 - game.pitch, 1, 0, 0) 
-    gluCylinder(gluNewQuadric(), 5, 5, 30, 8, 8)
-    glPopMatrix()
-    glPopMatrix()
-
-def draw_entities():
-    glColor3f(*COLOR_ENEMY)
-    for e in game.enemies:
-        glPushMatrix()
-        glTranslatef(e[0], e[1], e[2])
-        s = 1.0 + 0.2 * math.sin(time.time() * 10)
-        glScalef(s, s, s)
-        glutSolidSphere(12, 12, 12)
-        glPopMatrix()
-    
-    for b in game.bullets:
-        glPushMatrix()
-        glTranslatef(b[0], b[1], b[2])
-        if b[6] == 1: glColor3f(*COLOR_GRENADE); glutSolidSphere(6, 8, 8)
-        else: glColor3f(*COLOR_BULLET); glutSolidSphere(4, 8, 8)
-        glPopMatrix()
-
-def draw_particles():
-    glPointSize(3)
-    glBegin(GL_POINTS)
-    for p in game.particles:
-        glColor3f(*p.color)
-        glVertex3f(*p.position)
-    glEnd()
-
-def draw_nuke():
-    if not game.nuke_active: return
-    glPushMatrix()
-    glTranslatef(*game.nuke_position)
-    glEnable(GL_BLEND)
-    glBlendFunc(GL_SRC_ALPHA, GL_ONE)
-    glColor4f(1.0, 0.5, 0.0, 0.5)
-    glutSolidSphere(game.nuke_scale, 32, 32)
-    glColor4f(1.0, 1.0, 1.0, 0.8)
-    glutSolidSphere(game.nuke_scale * 0.5, 32, 32)
-    glDisable(GL_BLEND)
-    glPopMatrix()
+        if s.slice_mode and is_solid:
+            # Flicker Green Logic
+            gfx.blend('alpha')
+            
+            if is_hovered:
+                 gfx.color(0.0, 1.0, 0.0, 0.8) # Bright Green if hovered
+            else:
+                 gfx.color(0.0, 1.0, 0.0, 0.3 * flicker) # Pulsing Green
+                 
+            gfx.scale(1.05, 1.05, 1.05)
+            gfx.solid_cube(BLOCK_SIZE)
+            gfx.scale(1/1.05, 1/1.05, 1/1.05)
+            gfx.blend(None)
+        elif s.slice_mode and (x, y, z) == s.hovered_cell:
+            # Aimed at a block in a layer that cannot be sliced
+            gfx.blend('alpha')
+            gfx.color(*COLOR_HIGHLIGHT_INVALID)
+            gfx.scale(1.05, 1.05, 1.05)
+            gfx.solid_cube(BLOCK_SIZE)
+            gfx.scale(1/1.05, 1/1.05, 1/1.05)
+            gfx.blend(None)
+        
+        if not hidden:
+            gfx.color(*TETRIS_COLORS[col-1])
+            gfx.solid_cube(BLOCK_SIZE - 2)
+        
+        gfx.pop_matrix()
 
-def showScreen():
-    glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
-    glLoadIdentity()
-    gluLookAt(game.camera_pos[0], game.camera_pos[1], game.camera_pos[2],
-              game.camera_target[0], game.camera_target[1], game.camera_target[2],
-              0, 0, 1)
-    
-    draw_grid()
-    draw_wall()
-    draw_summoners()
-    draw_tower()
-    draw_player()
-    draw_entities()
-    draw_particles()
-    draw_nuke()
+def draw_player(s, q):
+    if s.fps_mode: return 
+    gfx.push_matrix()
+    gfx.translate(*s.player_pos)
+    gfx.rotate(s.yaw - 90, 0, 0, 1) 
+    gfx.color(*COLOR_PLAYER)
+    gfx.solid_sphere(15, lod(16, q), lod(16, q))
+    gfx.push_matrix()
+    gfx.color(*COLOR_GUN)
+    gfx.translate(0, 10, 5)
+    gfx.rotate(90 - s.pitch, 1, 0, 0) 
+    gfx.cylinder(5, 5, 30, lod(8, q), 8)
+    gfx.pop_matrix()
+    gfx.pop_matrix()
+
+def draw_entities(s, q):
+    pulse = 1.0 + 0.2 * math.sin(time.time() * 10)
+    detail = lod(12, q); bullet_detail = lod(8, q)
+    last_kind = -1
+    for x, y, z, kind in s.enemies:
+        if kind != last_kind: gfx.color(*ENEMY_TYPES[kind]['color']); last_kind = kind
+        gfx.push_matrix()
+        gfx.translate(x, y, z)
+        gfx.scale(pulse, pulse, pulse)
+        gfx.solid_sphere(ENEMY_TYPES[kind]['radius'], detail, detail)
+        gfx.pop_matrix()
     
-    draw_text(10, 770, f"Score: {game.score}")
-    draw_text(10, 740, f"Lives: {game.lives}")
-    draw_text(10, 710, f"Tower: {game.tower_height}/{TOWER_LIMIT}")
-    draw_text(10, 680, f"Killstreak: {game.killstreak}")
+    for x, y, z, kind in s.bullets:
+        gfx.push_matrix()
+        gfx.translate(x, y, z)
+        if kind == 1: gfx.color(*COLOR_GRENADE); gfx.solid_sphere(6, bullet_detail, bullet_detail)
+        else: gfx.color(*COLOR_BULLET); gfx.solid_sphere(4, bullet_detail, bullet_detail)
+        gfx.pop_matrix()
+
+def draw_particles(s):
+    gfx.point_size(3)
+    gfx.begin('points')
+    for position, color in s.particles:
+        gfx.color(*color)
+        gfx.vertex(*position)
+    gfx.end()
+
+def draw_nuke(s, q):
+    if not s.nuke_active: return
+    detail = lod(32, q)
+    gfx.push_matrix()
+    gfx.translate(*s.nuke_position)
+    gfx.blend('additive')
+    gfx.color(1.0, 0.5, 0.0, 0.5)
+    gfx.solid_sphere(s.nuke_scale, detail, detail)
+    gfx.color(1.0, 1.0, 1.0, 0.8)
+    gfx.solid_sphere(s.nuke_scale * 0.5, detail, detail)
+    gfx.blend(None)
+    gfx.pop_matrix()
+
+def draw_hud(s):
+    draw_text(10, 770, f"Score: {s.score}")
+    draw_text(10, 740, f"Lives: {s.lives}")
+    draw_text(10, 710, f"Tower: {s.tower_height}/{TOWER_LIMIT}")
+    draw_text(10, 680, f"Killstreak: {s.killstreak}")
+    draw_text(WINDOW_WIDTH - 220, 770, f"Wave {s.wave}: {len(s.enemies)} enemies")
     
-    if game.slice_mode: draw_text(10, 650, "SLICE MODE: Click FLICKERING layers!", (1,1,0))
-    if game.nuke_available: draw_text(10, 620, "NUKE READY! Press O", (1, 0.5, 0))
-    elif game.grenades > 0: draw_text(10, 620, f"GRENADES: {game.grenades} (Q)", (0, 1, 0))
-    if game.cheat_mode: draw_text(10, 590, "CHEAT MODE ACTIVE", (1,0,1))
+    if s.slice_mode: draw_text(10, 650, "SLICE MODE: Click FLICKERING layers!", (1,1,0))
+    if s.nuke_available: draw_text(10, 620, "NUKE READY! Press O", (1, 0.5, 0))
+    elif s.grenades > 0: draw_text(10, 620, f"GRENADES: {s.grenades} (Q)", (0, 1, 0))
+    if s.cheat_mode: draw_text(10, 590, "CHEAT MODE ACTIVE", (1,0,1))
     
-    if game.debug_mode:
-        draw_text(10, 100, f"Pos: {game.player_pos[0]:.0f},{game.player_pos[1]:.0f},{game.player_pos[2]:.0f}", (1,1,1))
+    if s.debug_mode:
+        draw_text(10, 100, f"Pos: {s.player_pos[0]:.0f},{s.player_pos[1]:.0f},{s.player_pos[2]:.0f}", (1,1,1))
         
-    if game.game_over: 
+    if s.game_over: 
         draw_text(WINDOW_WIDTH//2 - 100, WINDOW_HEIGHT//2 + 20, "GAME OVER", (1,0,0))
-        draw_text(WINDOW_WIDTH//2 - 120, WINDOW_HEIGHT//2 - 20, f"Reason: {game.game_over_reason}", (1,1,1))
+        draw_text(WINDOW_WIDTH//2 - 120, WINDOW_HEIGHT//2 - 20, f"Reason: {s.game_over_reason}", (1,1,1))
         draw_text(WINDOW_WIDTH//2 - 80, WINDOW_HEIGHT//2 - 50, "Press R to Restart", (0,1,0))
+
+def render_frame(s, q=QUALITY_LEVELS[0]):
+    gfx.clear()
+    gfx.look_at(s.camera_pos, s.camera_target)
+    
+    draw_grid()
+    draw_wall()
+    draw_summoners(q)
+    draw_tower(s, q)
+    draw_player(s, q)
+    draw_entities(s, q)
+    draw_particles(s)
+    draw_nuke(s, q)
+    
+    # Lower quality levels refresh the HUD text less often and replay it in between
+    gfx.cached('hud', q['hud_interval'], lambda: draw_hud(s))
     
     # Draw Crosshair if FPS mode OR Slice Mode is active
-    if game.fps_mode or game.slice_mode:
-        glMatrixMode(GL_PROJECTION); glPushMatrix(); glLoadIdentity()
-        gluOrtho2D(0, 1000, 0, 800)
-        glMatrixMode(GL_MODELVIEW); glPushMatrix(); glLoadIdentity()
+    if s.fps_mode or s.slice_mode:
+        gfx.begin_overlay()
         
-        if game.slice_mode: glColor3f(0, 1, 0) # Green crosshair for slice
-        else: glColor3f(1, 1, 1) # White for gun
+        if s.slice_mode: gfx.color(0, 1, 0) # Green crosshair for slice
+        else: gfx.color(1, 1, 1) # White for gun
             
-        glBegin(GL_LINES)
-        glVertex2f(490, 400); glVertex2f(510, 400); glVertex2f(500, 390); glVertex2f(500, 410)
-        glEnd()
-        glPopMatrix(); glMatrixMode(GL_PROJECTION); glPopMatrix(); glMatrixMode(GL_MODELVIEW)
+        gfx.begin('lines')
+        gfx.vertex(490, 400); gfx.vertex(510, 400); gfx.vertex(500, 390); gfx.vertex(500, 410)
+        gfx.end()
+        gfx.end_overlay()
 
-    glutSwapBuffers()
+def showScreen():
+    # Grab the published snapshot once; the simulation may flip buffers mid-frame
+    start = time.perf_counter()
+    render_frame(sim.front(), governor.settings)
+    governor.record_frame(time.perf_counter() - start)
+    gfx.swap_buffers()
 
 # ================= MAIN =================
-def idle():
-    game.update()
-    glutPostRedisplay()
+# Window callbacks never touch GameState directly: they queue commands for the
+# simulation process, and the display callback reads the latest snapshot. Special
+# keys and mouse buttons arrive as names, already translated by skyBridgeGL.
+KEY_COMMANDS = {' ': ('fire', 0), 'q': ('fire', 1), 'o': ('nuke', None), 'r': ('restart', None),
+                'p': ('pause', None), 'c': ('cheat', None), 'e': ('slice', None), 'b': ('debug', None)}
 
 def keyboard(key, x, y):
     try: k = key.decode("utf-8").lower()
     except: return
-    if k == 'w': game.keys['w'] = True
-    elif k == 's': game.keys['s'] = True
-    elif k == 'a': game.keys['a'] = True
-    elif k == 'd': game.keys['d'] = True
-    elif k == ' ': game.fire_bullet(0)
-    elif k == 'q': game.fire_bullet(1)
-    elif k == 'o': game.use_nuke()
-    elif k == 'r': game.__init__()
-    elif k == 'p': game.paused = not game.paused
-    elif k == 'c': game.cheat_mode = not game.cheat_mode
-    elif k == 'e': game.slice_mode = not game.slice_mode
-    elif k == 'b': game.debug_mode = not game.debug_mode
+    if k in ('w', 's', 'a', 'd'): sim.post('key_down', k)
+    elif k in KEY_COMMANDS: sim.post(*KEY_COMMANDS[k])
 
 def keyboardUp(key, x, y):
     try: k = key.decode("utf-8").lower()
     except: return
-    if k in game.keys: game.keys[k] = False
-
-def special(key, x, y):
-    if key == GLUT_KEY_LEFT: game.keys['left'] = True
-    elif key == GLUT_KEY_RIGHT: game.keys['right'] = True
-    elif key == GLUT_KEY_UP: game.keys['up'] = True
-    elif key == GLUT_KEY_DOWN: game.keys['down'] = True
-
-def specialUp(key, x, y):
-    if key == GLUT_KEY_LEFT: game.keys['left'] = False
-    elif key == GLUT_KEY_RIGHT: game.keys['right'] = False
-    elif key == GLUT_KEY_UP: game.keys['up'] = False
-    elif key == GLUT_KEY_DOWN: game.keys['down'] = False
-
-def mouse(button, state, x, y):
-    if state == GLUT_DOWN:
-        if button == GLUT_RIGHT_BUTTON:
-            game.fps_mode = not game.fps_mode
-        elif button == GLUT_LEFT_BUTTON:
-            if game.slice_mode:
-                game.perform_slice()
-            else:
-                game.fire_bullet(0)
+    sim.post('key_up', k)
+
+def special(key):
+    sim.post('key_down', key)
+
+def specialUp(key):
+    sim.post('key_up', key)
+
+def mouse(button):
+    if button == 'right':
+        sim.post('camera')
+    elif button == 'left':
+        sim.post('click')
 
 def main():
-    global game
-    game = GameState()
-    
-    glutInit()
-    glutInitDisplayMode(GLUT_DOUBLE | GLUT_RGB | GLUT_DEPTH)
-    glutInitWindowSize(1000, 800)
-    glutCreateWindow(b"Sky-Bridge Siege [ARCHITECT UPDATE]")
-    glEnable(GL_DEPTH_TEST)
-    glEnable(GL_BLEND) 
-    glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
-    glClearColor(*COLOR_BG, 1.0)
-    
-    glutDisplayFunc(showScreen)
-    glutIdleFunc(idle)
-    glutKeyboardFunc(keyboard)
-    glutKeyboardUpFunc(keyboardUp)
-    glutSpecialFunc(special)
-    glutSpecialUpFunc(specialUp)
-    glutMouseFunc(mouse)
-    
-    glMatrixMode(GL_PROJECTION)
-    glLoadIdentity()
-    gluPerspective(FOV_Y, 1.25, 0.1, 1500)
-    glMatrixMode(GL_MODELVIEW)
+    global sim, governor, gfx
+    parser = argparse.ArgumentParser(description="Sky-Bridge Siege")
+    parser.add_argument('--waves', choices=sorted(WAVE_PRESETS), default=WAVE_PRESET, help="Wave spawn table")
+    parser.add_argument('--frame-target', type=float, default=FRAME_TARGET_MS,
+                        help="Frame time budget in ms for the quality governor")
+    args = parser.parse_args()
+
+    # Open the window first so it appears before the game state is built
+    import skyBridgeGL
+    gfx = skyBridgeGL.open_window(b"Sky-Bridge Siege [ARCHITECT UPDATE]")
+    governor = QualityGovernor(args.frame_target)
+    sim = Simulation(GameState(args.waves), governor=governor)
     
     print("----- Controls -----")
     print("Arrows      : Look/Aim")
@@ -826,7 +1410,11 @@ def main():
     print("B           : Toggle Debug Info")
     print("Right Click : Toggle Camera")
     
-    glutMainLoop()
+    sim.start()
+    try:
+        skyBridgeGL.run(showScreen, sim.poll, keyboard, keyboardUp, special, specialUp, mouse)
+    finally:
+        sim.stop()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()